@@ -1,5 +1,5 @@
 @echo off
 echo Starting Disk Cleanup Agent...
-python src/cleanup_agent.py
+python -m src
 echo Cleanup Complete!
 pause
\ No newline at end of file
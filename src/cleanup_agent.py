@@ -1,36 +1,48 @@
 import os
-import json
+import sys
+import signal
 import logging
-from pathlib import Path
 from src.utils.safety_checker import SafetyChecker
 from src.utils.file_manager import FileManager
+from src.utils.rules import CompiledRules
+from src.utils.log_setup import setup_logging
+from src.utils.metrics import Metrics
+from src.utils.locations import LocationProvider
+from src.utils.throttle import apply_process_priority
+from src.utils.system_info import get_disk_space_info, get_mount_point, group_by_device
 
 class CleanupAgent:
-    def __init__(self, config_path='src/config/settings.json'):
+    def __init__(self, config_path='src/config/settings.json', config=None, rules=None):
+        """``config``/``rules`` let a caller pass an already loaded (cached) configuration"""
+        self.config = config if config is not None else self.load_config(config_path)
+        # Anchor for relative path settings such as deletion.quarantine_dir
+        self.config.setdefault('config_dir', os.path.dirname(os.path.abspath(config_path)))
+        # Before setup_logging(), so the log thread inherits the lower priority
+        priority_messages = apply_process_priority(self.config)
         self.setup_logging()
-        self.config = self.load_config(config_path)
-        self.safety_checker = SafetyChecker(self.config)
+        for level, message in priority_messages:
+            logging.log(level, message)
+        self.rules = rules if rules is not None else CompiledRules.from_config(self.config)
+        self.safety_checker = SafetyChecker(self.config, self.rules)
         self.file_manager = FileManager(self.config, self.safety_checker)
+        self.metrics = Metrics(self.config)
+        if self.metrics.enabled:
+            self.safety_checker.instrument(self.metrics)
+            self.file_manager.instrument(self.metrics)
         
     def setup_logging(self):
-        """Setup logging configuration"""
-        log_file = 'logs/cleanup.log'
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        
-        logging.basicConfig(
-            filename=log_file,
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        # Add console handler
-        console = logging.StreamHandler()
-        console.setLevel(logging.INFO)
-        logging.getLogger('').addHandler(console)
+        """Setup logging configuration
+
+        See ``logging`` in settings.json: ``async`` moves all log I/O to a
+        background thread, ``max_bytes``/``backup_count`` rotate the log,
+        ``audit_file`` adds a JSONL audit stream and ``per_file`` samples
+        or suppresses per-file lines.
+        """
+        setup_logging(self.config, log_file='logs/cleanup.log')
         
     def load_config(self, config_path):
         """Load configuration from JSON file"""
+        import json
         try:
             with open(config_path, 'r') as f:
                 return json.load(f)
@@ -38,8 +50,116 @@ class CleanupAgent:
             logging.error(f"Error loading config: {e}")
             raise
             
-    def run(self, dry_run=True):
-        """Run the cleanup process"""
+    def get_scan_roots(self):
+        """Return the existing directories selected by the locations config"""
+        return LocationProvider(self.config).scan_roots()
+
+    def get_duplicate_roots(self):
+        """Return the existing download and custom folders searched for duplicates"""
+        return LocationProvider(self.config).duplicate_roots()
+
+    def clean_duplicates(self, roots=None, dry_run=True):
+        """Delete (or report) redundant copies of identical files"""
+        if roots is None:
+            roots = self.get_duplicate_roots()
+        if not roots:
+            return 0, 0
+        logging.info(f"\nSearching for duplicates in: {', '.join(roots)}")
+        candidates = self.file_manager.iter_duplicates(*roots)
+        if dry_run:
+            size, count = self.file_manager.report_candidates(candidates)
+            logging.info(f"Would delete {count} duplicate files ({size:.2f} MB)")
+        else:
+            size, count = self.file_manager.delete_candidates(candidates)
+            logging.info(f"Cleaned {count} duplicate files ({size:.2f} MB)")
+            self.file_manager.log_deletion_report()
+        self.file_manager.duplicates.log_summary()
+        return size, count
+
+    def cleanup_trash(self, roots=None, dry_run=True):
+        """Enforce recycle_bin.max_trash_gb / max_trash_age_days on the trash"""
+        from src.utils.trash import TrashManager
+        if roots is None:
+            roots = self.get_scan_roots()
+        logging.info("\nChecking trash size and age limits")
+        return TrashManager(self.config).cleanup(roots, dry_run=dry_run)
+
+    def iter_candidates(self, roots=None):
+        """Stream deletion candidates as FileRecords (path, size, mtime, reason)
+
+        This is the single pipeline behind dry runs, real cleanups and
+        reports. Records are produced lazily while the scan runs, so memory
+        use does not grow with the size of the tree.
+        """
+        if roots is None:
+            roots = self.get_scan_roots()
+        return self.file_manager.iter_candidates(*roots)
+
+    def clean_under_pressure(self, roots, dry_run=True):
+        """Clean only volumes whose free space is below the threshold
+
+        Candidates on a low volume are ranked (``cleanup.priority``, largest
+        first by default) and deleted until ``target_free_gb`` is free again; volumes with enough
+        space are not scanned at all.
+        """
+        cleanup = self.config['cleanup']
+        threshold_gb = cleanup.get('low_disk_threshold_gb', 10)
+        target_gb = max(cleanup.get('target_free_gb', threshold_gb), threshold_gb)
+        total_size = 0
+        total_count = 0
+        
+        if self.file_manager.backend.name in ('send2trash', 'freedesktop'):
+            logging.warning("Deletion backend moves files to the trash; space on the same "
+                            "volume is only reclaimed once the trash is emptied")
+        
+        for dev_roots in group_by_device(roots).values():
+            mount = get_mount_point(dev_roots[0])
+            info = get_disk_space_info(dev_roots[0])
+            if info['free_gb'] >= threshold_gb:
+                logging.info(f"{mount}: {info['free_gb']:.2f} GB free, above "
+                             f"{threshold_gb} GB threshold - skipping")
+                continue
+                
+            needed = int((target_gb - info['free_gb']) * 2**30)
+            logging.info(f"{mount}: {info['free_gb']:.2f} GB free, below {threshold_gb} GB "
+                         f"threshold - reclaiming {needed / 2**30:.2f} GB")
+            size, count = self.file_manager.clean_prioritized(
+                lambda: self.iter_candidates(dev_roots), dry_run, byte_budget=needed)
+            if not dry_run:
+                info = get_disk_space_info(dev_roots[0])
+                logging.info(f"{mount}: {info['free_gb']:.2f} GB free after cleanup")
+            total_size += size
+            total_count += count
+            
+        return total_size, total_count
+
+    def record_metrics(self):
+        """Add run counters to the metrics and export the run summary"""
+        if not self.metrics.enabled:
+            return
+        scan_stats = self.file_manager.scanner.stats
+        for name in ('dirs_scanned', 'dirs_pruned', 'dirs_reused', 'stat_calls', 'errors'):
+            self.metrics.inc(f"scan_{name}", getattr(scan_stats, name))
+        self.metrics.inc("scan_files", scan_stats.files_yielded)
+        for action, (count, size) in self.file_manager.events.totals().items():
+            self.metrics.inc(f"files_{action}", count)
+            self.metrics.inc(f"bytes_{action}", size)
+        self.metrics.log_summary()
+        self.metrics.finish_run()
+        
+    def run(self, dry_run=True, pressure=None, duplicates=None):
+        """Run the cleanup process
+
+        ``pressure`` (default: ``cleanup.pressure_mode``) limits the run to
+        volumes below ``cleanup.low_disk_threshold_gb``. ``duplicates``
+        (default: ``duplicates.enabled``) also removes duplicate files from
+        the download and custom folders.
+        """
+        if pressure is None:
+            pressure = self.config['cleanup'].get('pressure_mode', False)
+        if duplicates is None:
+            duplicates = self.config.get('duplicates', {}).get('enabled', False)
+        self.metrics.start_run()
         if dry_run:
             logging.info("=" * 50)
             logging.info("STARTING DRY RUN - NO FILES WILL BE DELETED")
@@ -56,32 +176,157 @@ class CleanupAgent:
         logging.info(f"- Minimum file age: {self.config['cleanup']['min_file_age_days']} days")
         logging.info(f"- Minimum file size: {self.config['cleanup']['min_size_mb']} MB")
         logging.info(f"- Target extensions: {', '.join(self.config['cleanup']['target_extensions'])}")
+        logging.info(f"- Scan workers: {self.file_manager.workers}")
         
-        # Clean temp directories
-        if self.config['locations']['temp_cleanup']:
-            temp_dirs = [
-                os.environ.get('TEMP'),
-                os.path.join(os.environ.get('WINDIR'), 'Temp')
-            ]
-            
-            for temp_dir in temp_dirs:
-                if temp_dir and os.path.exists(temp_dir):
-                    logging.info(f"\nScanning directory: {temp_dir}")
-                    if not dry_run:
-                        size, count = self.file_manager.clean_directory(temp_dir)
-                        logging.info(f"Cleaned {count} files ({size:.2f} MB)")
-                    else:
-                        logging.info("DRY RUN - showing what would be deleted:")
-                        for item in Path(temp_dir).rglob('*'):
-                            if (item.is_file() and 
-                                self.safety_checker.is_safe_to_delete(item) and 
-                                self.file_manager.should_delete_file(item)):
-                                size_mb = item.stat().st_size / (1024 * 1024)
-                                logging.info(f"Would delete: {item} ({size_mb:.2f} MB)")
+        roots = self.get_scan_roots()
+        if roots and pressure:
+            logging.info(f"\nChecking disk pressure for: {', '.join(roots)}")
+            size, count = self.clean_under_pressure(roots, dry_run)
+            verb = "Would delete" if dry_run else "Cleaned"
+            logging.info(f"{verb} {count} files ({size:.2f} MB)")
+            if not dry_run:
+                self.file_manager.log_deletion_report()
+        elif roots and self.file_manager.priority:
+            logging.info(f"\nScanning directories: {', '.join(roots)}")
+            size, count = self.file_manager.clean_prioritized(
+                lambda: self.iter_candidates(roots), dry_run)
+            verb = "Would delete" if dry_run else "Cleaned"
+            logging.info(f"{verb} {count} files ({size:.2f} MB)")
+            if not dry_run:
+                self.file_manager.log_deletion_report()
+        elif roots:
+            logging.info(f"\nScanning directories: {', '.join(roots)}")
+            candidates = self.iter_candidates(roots)
+            if not dry_run:
+                size, count = self.file_manager.delete_candidates(candidates)
+                logging.info(f"Cleaned {count} files ({size:.2f} MB)")
+                self.file_manager.log_deletion_report()
+            else:
+                logging.info("DRY RUN - showing what would be deleted:")
+                size, count = self.file_manager.report_candidates(candidates)
+                logging.info(f"Would delete {count} files ({size:.2f} MB)")
                         
+        if duplicates:
+            self.clean_duplicates(dry_run=dry_run)
+
+        if self.config.get('recycle_bin', {}).get('cleanup_recycle_bin', False):
+            self.cleanup_trash(roots, dry_run=dry_run)
+            
+        scan_stats = self.file_manager.scanner.stats
+        logging.info(f"Scanned {scan_stats.files_yielded} files in {scan_stats.dirs_scanned} directories "
+                     f"({scan_stats.syscalls} syscalls, {scan_stats.syscalls_per_file:.2f} per file)")
+        if scan_stats.dirs_reused:
+            logging.info(f"Reused {scan_stats.dirs_reused} unchanged directories from the scan index")
+        trees_found = getattr(self.file_manager.scanner, 'trees_found', 0)
+        if trees_found:
+            logging.info(f"Collapsed {trees_found} fully eligible directories into whole-tree deletes")
+        if self.file_manager.throttle is not None:
+            self.file_manager.throttle.log_summary()
+        self.file_manager.events.log_summary()
+        self.record_metrics()
+        self.file_manager.events.reset()
         logging.info("\nCleanup process completed")
         logging.info("=" * 50)
 
+    def write_plan(self, plan_path, roots=None):
+        """Scan once and store the candidates as a plan file for apply_plan()
+
+        Every planned file is also reported like a dry run, so the plan
+        can be reviewed from the log before it is applied.
+        """
+        from src.utils.plan import PlanWriter
+        from src.utils.scan_index import rules_fingerprint
+        if roots is None:
+            roots = self.get_scan_roots()
+        logging.info(f"Planning cleanup of: {', '.join(roots)}")
+        writer = PlanWriter(plan_path, rules_fingerprint(self.config))
+        for record in self.iter_candidates(roots):
+            writer.add(record)
+            self.file_manager.events.event('would_delete', record)
+        count = writer.close()
+        logging.info(f"Wrote plan {plan_path}: {count} entries "
+                     f"({writer.bytes / (1024 * 1024):.2f} MB)")
+        self.file_manager.events.log_summary()
+        self.file_manager.events.reset()
+        return count
+
+    def write_report(self, report_path, roots=None):
+        """Scan once and write disk usage by directory, extension and age"""
+        from src.utils.usage import UsageReport
+        if roots is None:
+            roots = self.get_scan_roots()
+        logging.info(f"Reporting disk usage of: {', '.join(roots)}")
+        report = UsageReport(self.config, self.rules, self.file_manager.throttle)
+        for root in roots:
+            report.scan(root)
+        report.write(report_path)
+        report.log_summary()
+        stats = report.scanner.stats
+        logging.info(f"Wrote report {report_path} ({stats.files_yielded} files in "
+                     f"{stats.dirs_scanned} directories)")
+        return report
+
+    def apply_plan(self, plan_path, dry_run=False):
+        """Execute a plan written by write_plan() without walking the tree again
+
+        Each entry is revalidated with one stat relative to its directory
+        (inode, device, size, mtime) plus the in-use check; entries that
+        changed since planning are skipped.
+        """
+        from src.utils.plan import Plan, PlanValidator, describe
+        from src.utils.scan_index import rules_fingerprint
+        with Plan(plan_path) as plan:
+            describe(plan)
+            if plan.fingerprint != rules_fingerprint(self.config):
+                logging.warning("Cleanup rules changed since the plan was written; "
+                                "applying the plan as written")
+            self.safety_checker.in_use.begin_run()
+            self.file_manager.scan_roots = self.get_scan_roots()
+            validator = PlanValidator(plan)
+            records = (record for record in validator
+                       if self.safety_checker.is_safe_record(record))
+            if dry_run:
+                size, count = self.file_manager.report_candidates(records)
+                logging.info(f"Would delete {count} files ({size:.2f} MB)")
+            else:
+                size, count = self.file_manager.delete_candidates(records)
+                logging.info(f"Cleaned {count} files ({size:.2f} MB)")
+                self.file_manager.log_deletion_report()
+            logging.info(f"Skipped {validator.skipped} plan entries that changed since planning")
+        self.file_manager.events.log_summary()
+        self.file_manager.events.reset()
+        return size, count
+
+    def run_daemon(self, dry_run=False, roots=None):
+        """Keep running and delete files as they cross the age limit (Linux)
+
+        See CleanupDaemon: the watched roots are scanned once, then kept up
+        to date with inotify; ``daemon.rescan_hours`` sets how often a full
+        consistency rescan runs. SIGTERM/SIGINT stop the daemon.
+        """
+        from src.utils.daemon import CleanupDaemon
+        if roots is None:
+            roots = self.get_scan_roots()
+        if not roots:
+            logging.error("Daemon mode: no directories to watch")
+            return
+        try:
+            daemon = CleanupDaemon(self.file_manager, roots, self.config, dry_run)
+        except OSError as e:
+            logging.error(f"Daemon mode needs inotify (Linux): {e}")
+            return
+
+        def stop(signum, frame):
+            logging.info(f"Received signal {signum}, stopping daemon")
+            daemon.stop()
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, stop)
+        logging.info(f"Daemon watching: {', '.join(roots)}" + (" (dry run)" if dry_run else ""))
+        daemon.run()
+        self.file_manager.events.log_summary()
+        logging.info("Daemon stopped")
+
 if __name__ == "__main__":
-    agent = CleanupAgent()
-    agent.run(dry_run=True)
\ No newline at end of file
+    from src.cli import main
+    sys.exit(main())
\ No newline at end of file
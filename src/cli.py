@@ -0,0 +1,134 @@
+"""Command line entry point: python -m src [options]
+
+Only sys is imported up front. The configuration comes from a pickle
+cache next to settings.json, and the cleanup engine (logging setup,
+scanners, deletion backends) is imported only once there is work to do,
+so a scheduled run that finds nothing to do exits in a few tens of
+milliseconds.
+"""
+import sys
+
+DEFAULT_CONFIG = 'src/config/settings.json'
+
+
+FLAGS = {
+    '--apply': ('apply', True),
+    '--pressure': ('pressure', True),
+    '--no-pressure': ('pressure', False),
+    '--duplicates': ('duplicates', True),
+    '--daemon': ('daemon', True),
+    '--no-cache': ('no_cache', True),
+}
+OPTIONS = {'--config': 'config', '--plan': 'plan', '--apply-plan': 'apply_plan',
+           '--report': 'report'}
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m src',
+                                     description="Clean temporary files (dry run unless --apply)")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="path to settings.json")
+    parser.add_argument('--apply', action='store_true', help="actually delete files")
+    parser.add_argument('--pressure', action='store_true', default=None,
+                        help="only clean volumes below cleanup.low_disk_threshold_gb")
+    parser.add_argument('--no-pressure', dest='pressure', action='store_false')
+    parser.add_argument('--duplicates', action='store_true', default=None,
+                        help="also remove duplicate files from download/custom folders")
+    parser.add_argument('--daemon', action='store_true', help="keep running (Linux, inotify)")
+    parser.add_argument('--no-cache', action='store_true', help="ignore the config cache")
+    parser.add_argument('--plan', metavar='PATH',
+                        help="scan and write a deletion plan instead of deleting")
+    parser.add_argument('--apply-plan', metavar='PATH',
+                        help="execute a plan without rescanning (dry run unless --apply)")
+    parser.add_argument('--report', metavar='PATH',
+                        help="write disk usage by directory, extension and age (.json or .csv)")
+    return parser
+
+
+def parse_args(argv=None):
+    """Parse the command line
+
+    Importing and setting up argparse costs more than the whole no-op
+    run, so plain flag lists are parsed directly and argparse is only
+    used for --help, typos and anything else it has to report.
+    """
+    from types import SimpleNamespace
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = SimpleNamespace(config=DEFAULT_CONFIG, apply=False, pressure=None,
+                           duplicates=None, daemon=False, no_cache=False,
+                           plan=None, apply_plan=None, report=None)
+    remaining = iter(argv)
+    for arg in remaining:
+        option, sep, value = arg.partition('=')
+        if arg in FLAGS:
+            name, flag = FLAGS[arg]
+            setattr(args, name, flag)
+        elif option in OPTIONS:
+            if not sep:
+                value = next(remaining, None)
+            if value is None:
+                break
+            setattr(args, OPTIONS[option], value)
+        else:
+            break
+    else:
+        return args
+    return build_parser().parse_args(argv)
+
+
+def nothing_to_do(config, roots, pressure):
+    """Return why this run can exit right away, or None if there is work"""
+    if not roots:
+        return "No scan directories exist; nothing to do"
+    if pressure:
+        from src.utils.system_info import get_disk_space_info, group_by_device
+        threshold_gb = config['cleanup'].get('low_disk_threshold_gb', 10)
+        for dev_roots in group_by_device(roots).values():
+            if get_disk_space_info(dev_roots[0])['free_gb'] < threshold_gb:
+                return None
+        return f"All volumes have at least {threshold_gb} GB free; nothing to do"
+    return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from src.utils.config_cache import CachedConfig
+    cached = CachedConfig.load(args.config, use_cache=not args.no_cache)
+    config = cached.config
+    pressure = args.pressure
+    if pressure is None:
+        pressure = config['cleanup'].get('pressure_mode', False)
+    duplicates = args.duplicates
+    if duplicates is None:
+        duplicates = config.get('duplicates', {}).get('enabled', False)
+
+    if not args.daemon and not args.apply_plan and not args.report:
+        from src.utils.locations import LocationProvider
+        locations = LocationProvider(config)
+        roots = locations.scan_roots()
+        reason = nothing_to_do(config, roots, pressure)
+        if reason and duplicates and locations.duplicate_roots():
+            reason = None
+        if reason and config.get('recycle_bin', {}).get('cleanup_recycle_bin', False):
+            reason = None
+        if reason:
+            print(reason)
+            return 0
+
+    from src.cleanup_agent import CleanupAgent
+    agent = CleanupAgent(args.config, config=config, rules=cached.rules)
+    if args.daemon:
+        agent.run_daemon(dry_run=not args.apply)
+    elif args.report:
+        agent.write_report(args.report)
+    elif args.plan:
+        agent.write_plan(args.plan)
+    elif args.apply_plan:
+        agent.apply_plan(args.apply_plan, dry_run=not args.apply)
+    else:
+        agent.run(dry_run=not args.apply, pressure=pressure, duplicates=duplicates)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
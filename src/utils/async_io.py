@@ -0,0 +1,313 @@
+import os
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.scanner import Scanner, FileRecord
+from src.utils.parallel_scanner import ParallelScanner
+from src.utils.deleters import UnlinkBackend
+
+
+class MountLimits:
+    """Maximum number of in-flight metadata operations per device.
+
+    ``mount_concurrency`` maps mount points (or any directory on the
+    mount) to a limit; every other device gets ``concurrency``. Limits are
+    resolved to st_dev once, semaphores are created per event loop.
+    """
+
+    def __init__(self, concurrency=64, mount_concurrency=None):
+        self.concurrency = max(1, int(concurrency))
+        self.by_device = {}
+        for path, limit in (mount_concurrency or {}).items():
+            try:
+                self.by_device[os.stat(os.path.expanduser(path)).st_dev] = max(1, int(limit))
+            except OSError as e:
+                logging.warning(f"Ignoring concurrency limit for {path}: {e}")
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.get('async_io', {})
+        return cls(settings.get('concurrency', 64), settings.get('mount_concurrency', {}))
+
+    def limit_for(self, dev):
+        return self.by_device.get(dev, self.concurrency)
+
+    def semaphores(self):
+        """Per-device semaphores, created on first use inside the event loop"""
+        return _Semaphores(self)
+
+
+class _Semaphores(dict):
+    def __init__(self, limits):
+        super().__init__()
+        self.limits = limits
+
+    def __missing__(self, dev):
+        semaphore = self[dev] = asyncio.Semaphore(self.limits.limit_for(dev))
+        return semaphore
+
+
+class AsyncScanner(ParallelScanner):
+    """Directory walker for high-latency (NFS/SMB) file systems.
+
+    On a network share every readdir and stat is a round trip, so a walk
+    is bound by latency, not bandwidth. This walker keeps many of them in
+    flight: an asyncio loop in a background thread runs ``workers``
+    directory tasks, hands each listing to a thread pool with
+    run_in_executor and stats the files of a directory in parallel chunks
+    of ``stat_batch``. Every operation holds the semaphore of the device
+    the directory is on, so ``MountLimits`` caps the load put on each
+    server, also for shares mounted below a scanned root. Records
+    are handed to the consumer in batches exactly like ParallelScanner.
+
+    Windows returns file attributes with the listing, so there the
+    entries' cached stat results are used and no extra stat is issued.
+    """
+
+    def __init__(self, workers=64, batch_size=256, queue_size=64, rules=None,
+                 limits=None, stat_batch=32):
+        super().__init__(workers, batch_size, queue_size, rules, device_lanes=False)
+        self.limits = limits or MountLimits(self.workers)
+        self.stat_batch = max(1, int(stat_batch))
+        self.stat_in_listing = os.name == 'nt'
+
+    @classmethod
+    def from_config(cls, config, rules=None):
+        settings = config.get('async_io', {})
+        concurrency = settings.get('concurrency', 64)
+        return cls(workers=concurrency, rules=rules, limits=MountLimits.from_config(config),
+                   stat_batch=settings.get('stat_batch', 32))
+
+    # -- blocking operations, run in the thread pool ----------------------
+
+    def _list_dir(self, directory, state, dev):
+        """List one directory: ([(path, name) or FileRecord], subdirs, stats)
+
+        ``subdirs`` holds (path, state, st_dev) so that a sub-directory on
+        another mount is throttled and limited as part of that mount.
+        """
+        scanner = Scanner(self.rules)
+        files = []
+        subdirs = []
+        if self.throttle is not None:
+            self.throttle.acquire(dev, 1)
+        try:
+            with os.scandir(directory) as it:
+                scanner.stats.dirs_scanned += 1
+                for entry in it:
+                    scanner.stats.entries_seen += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            child_state = state
+                            if self.rules is not None:
+                                child_state = scanner.child_state(entry, state)
+                                if child_state is None:
+                                    continue
+                            # Windows' cached listing stat has no st_dev
+                            child_dev = entry.stat(follow_symlinks=False).st_dev or dev
+                            if not self.stat_in_listing:
+                                scanner.stats.stat_calls += 1
+                            subdirs.append((entry.path, child_state, child_dev))
+                        elif entry.is_file(follow_symlinks=False):
+                            if self.stat_in_listing:
+                                stats = entry.stat(follow_symlinks=False)
+                                scanner.stats.stat_calls += 1
+                                files.append(FileRecord.from_entry(entry, stats))
+                            else:
+                                files.append((entry.path, entry.name))
+                    except OSError as e:
+                        scanner.stats.errors += 1
+                        logging.error(f"Error reading {entry.path}: {e}")
+        except OSError as e:
+            scanner.stats.errors += 1
+            logging.error(f"Error scanning directory {directory}: {e}")
+        return files, subdirs, scanner.stats
+
+    def _stat_files(self, chunk, dev):
+        """stat() a chunk of (path, name) pairs; return (records, errors)"""
+        if self.throttle is not None:
+            self.throttle.acquire(dev, len(chunk))
+        records = []
+        errors = 0
+        for path, name in chunk:
+            try:
+                stats = os.stat(path, follow_symlinks=False)
+            except OSError as e:
+                errors += 1
+                logging.error(f"Error reading {path}: {e}")
+                continue
+            records.append(FileRecord(path, name, stats.st_size, stats.st_mtime,
+                                      stats.st_ino, stats.st_dev))
+        return records, errors
+
+    @staticmethod
+    def _root_device(root):
+        try:
+            return os.stat(root).st_dev
+        except OSError:
+            return None
+
+    # -- event loop ------------------------------------------------------
+
+    async def _walk(self, roots, put, stop):
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='async-scan')
+        semaphores = self.limits.semaphores()
+        directories = asyncio.LifoQueue()
+        for root, state in roots:
+            dev = await loop.run_in_executor(pool, self._root_device, root)
+            directories.put_nowait((root, state, dev))
+        progress = {'pending': len(roots), 'batch': []}
+        finished = asyncio.Event()
+        list_dir = self._list_dir
+        if self.metrics is not None and self.metrics.enabled:
+            def list_dir(*args):
+                with self.metrics.timer('walk_dir'):
+                    return self._list_dir(*args)
+
+        async def run(dev, function, *args):
+            async with semaphores[dev]:
+                return await loop.run_in_executor(pool, function, *args)
+
+        async def stat_chunk(dev, chunk):
+            records, errors = await run(dev, self._stat_files, chunk, dev)
+            self.stats.stat_calls += len(chunk)
+            self.stats.errors += errors
+            return records
+
+        async def worker():
+            while True:
+                directory, state, dev = await directories.get()
+                files, subdirs, stats = await run(dev, list_dir, directory, state, dev)
+                self.stats.merge(stats)
+                progress['pending'] += len(subdirs)
+                for subdir in reversed(subdirs):
+                    directories.put_nowait(subdir)
+                if files and not isinstance(files[0], FileRecord):
+                    chunks = [files[i:i + self.stat_batch]
+                              for i in range(0, len(files), self.stat_batch)]
+                    files = [record for records in
+                             await asyncio.gather(*(stat_chunk(dev, chunk) for chunk in chunks))
+                             for record in records]
+                self.stats.files_yielded += len(files)
+                batch = progress['batch']
+                batch.extend(files)
+                if len(batch) >= self.batch_size:
+                    progress['batch'] = []
+                    await put(batch)
+                progress['pending'] -= 1
+                if progress['pending'] == 0:
+                    finished.set()
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        waiter = asyncio.create_task(finished.wait())
+        try:
+            # Wake up regularly to notice a consumer that stopped early
+            while not finished.is_set() and not stop.is_set():
+                done, _ = await asyncio.wait(tasks + [waiter], timeout=0.1,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is not waiter and task.exception() is not None:
+                        raise task.exception()
+            if progress['batch'] and not stop.is_set():
+                await put(progress['batch'])
+        finally:
+            for task in tasks + [waiter]:
+                task.cancel()
+            await asyncio.gather(*tasks, waiter, return_exceptions=True)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def walk_batches(self, roots):
+        """Yield lists of FileRecords while the event loop traverses the roots"""
+        root_scanner = Scanner(self.rules)
+        roots = [(root, root_scanner.root_state(root)) for root in map(os.fspath, roots)]
+        self.stats.merge(root_scanner.stats)
+        roots = [(root, state) for root, state in roots if state is not None]
+        if not roots:
+            return
+
+        stop = threading.Event()
+        out = queue.Queue(maxsize=self.queue_size)
+
+        async def put(batch):
+            while not stop.is_set():
+                try:
+                    out.put_nowait(batch)
+                    return
+                except queue.Full:
+                    await asyncio.sleep(0.01)
+
+        def run_loop():
+            try:
+                asyncio.run(self._walk(roots, put, stop))
+            except Exception as e:
+                logging.error(f"Async scan failed: {e}")
+
+        thread = threading.Thread(target=run_loop, daemon=True, name='async-scan-loop')
+        thread.start()
+        try:
+            while True:
+                try:
+                    yield out.get(timeout=0.1)
+                except queue.Empty:
+                    if not thread.is_alive():
+                        break
+            while not out.empty():
+                yield out.get_nowait()
+        finally:
+            stop.set()
+            thread.join()
+
+
+class AsyncUnlinkBackend(UnlinkBackend):
+    """UnlinkBackend that removes the files of a batch concurrently.
+
+    Batches from all deleter threads go to one event loop, where every
+    unlink runs in a thread pool under the semaphore of the file's device,
+    so a high-latency share sees up to its mount limit of requests in
+    flight instead of one per deleter thread.
+    """
+    name = 'async'
+
+    def __init__(self, limits=None):
+        super().__init__()
+        self.limits = limits or MountLimits()
+        self._loop = None
+        self._pool = None
+        self._semaphores = None
+
+    def _start(self):
+        with self._lock:
+            if self._loop is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.limits.concurrency,
+                                                thread_name_prefix='async-unlink')
+                loop = asyncio.new_event_loop()
+                self._semaphores = self.limits.semaphores()
+                threading.Thread(target=loop.run_forever, daemon=True,
+                                 name='async-unlink-loop').start()
+                self._loop = loop
+        return self._loop
+
+    async def _delete_all(self, records):
+        loop = asyncio.get_running_loop()
+
+        async def delete(record):
+            async with self._semaphores[record.dev]:
+                await loop.run_in_executor(self._pool, self.delete_one, record)
+
+        return await asyncio.gather(*(delete(record) for record in records),
+                                    return_exceptions=True)
+
+    def delete_batch(self, records):
+        loop = self._start()
+        results = asyncio.run_coroutine_threadsafe(self._delete_all(records), loop).result()
+        deleted = []
+        failed = []
+        for record, result in zip(records, results):
+            if isinstance(result, Exception):
+                failed.append((record, result))
+            else:
+                deleted.append(record)
+        return deleted, failed
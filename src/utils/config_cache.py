@@ -0,0 +1,72 @@
+import os
+import marshal
+
+# Bump when CompiledRules or the cache layout changes
+CACHE_VERSION = 2
+
+
+def cache_path_for(config_path):
+    return f"{config_path}.cache"
+
+
+class CachedConfig:
+    """settings.json plus its pickled CompiledRules, cached next to it.
+
+    The cache is keyed by the settings file's mtime, size and
+    CACHE_VERSION, so editing the config invalidates it. The outer file is
+    marshal (plain JSON data, no pickle or json import needed); the rules
+    are a nested pickle that is only loaded on first access, so a run that
+    exits early never imports or compiles them.
+    """
+
+    def __init__(self, config, rules_blob=None, rules=None):
+        self.config = config
+        self._rules_blob = rules_blob
+        self._rules = rules
+
+    @property
+    def rules(self):
+        if self._rules is None:
+            if self._rules_blob is not None:
+                import pickle
+                self._rules = pickle.loads(self._rules_blob)
+            else:
+                from src.utils.rules import CompiledRules
+                self._rules = CompiledRules.from_config(self.config)
+        return self._rules
+
+    @classmethod
+    def load(cls, config_path, use_cache=True):
+        stats = os.stat(config_path)
+        key = (CACHE_VERSION, marshal.version, stats.st_mtime_ns, stats.st_size)
+        cache_path = cache_path_for(config_path)
+        if use_cache:
+            try:
+                with open(cache_path, 'rb') as f:
+                    data = marshal.load(f)
+                if data.get('key') == key:
+                    return cls(data['config'], rules_blob=data['rules'])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                import logging
+                logging.warning(f"Ignoring unreadable config cache {cache_path}: {e}")
+
+        import json
+        import pickle
+        from src.utils.rules import CompiledRules
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        rules = CompiledRules.from_config(config)
+        if use_cache:
+            data = {'key': key, 'config': config,
+                    'rules': pickle.dumps(rules, pickle.HIGHEST_PROTOCOL)}
+            tmp = f"{cache_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, 'wb') as f:
+                    marshal.dump(data, f)
+                os.replace(tmp, cache_path)
+            except OSError as e:
+                import logging
+                logging.warning(f"Cannot write config cache {cache_path}: {e}")
+        return cls(config, rules=rules)
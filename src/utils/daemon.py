@@ -0,0 +1,228 @@
+import os
+import stat
+import time
+import heapq
+import logging
+import threading
+from src.utils.scanner import Scanner, FileRecord
+from src.utils import inotify
+
+WATCH_MASK = (inotify.IN_CREATE | inotify.IN_CLOSE_WRITE | inotify.IN_ATTRIB |
+              inotify.IN_DELETE | inotify.IN_MOVED_FROM | inotify.IN_MOVED_TO |
+              inotify.IN_DELETE_SELF | inotify.IN_ONLYDIR | inotify.IN_DONT_FOLLOW |
+              inotify.IN_EXCL_UNLINK)
+FILE_CHANGED = inotify.IN_CREATE | inotify.IN_CLOSE_WRITE | inotify.IN_ATTRIB | inotify.IN_MOVED_TO
+FILE_GONE = inotify.IN_DELETE | inotify.IN_MOVED_FROM
+
+
+class CleanupDaemon:
+    """Long-running cleanup driven by inotify instead of rescans.
+
+    After one initial scan the daemon keeps, per file that could ever
+    become a candidate (target extension, big enough, not protected), only
+    its mtime in a dict plus one (expires_at, path, mtime) entry in a heap.
+    Files that can never qualify are not tracked at all. inotify events
+    keep the model current; when the head of the heap expires the file is
+    stat()-ed once, re-checked with the normal candidate rules and handed
+    to the deletion pipeline. Heap entries superseded by a later change are
+    skipped lazily and compacted when they pile up.
+
+    Full rescans only run every ``daemon.rescan_hours`` (or after an
+    inotify queue overflow) as a consistency check.
+    """
+
+    def __init__(self, file_manager, roots, config, dry_run=False):
+        settings = config.get('daemon', {})
+        self.file_manager = file_manager
+        self.rules = file_manager.rules
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.dry_run = dry_run
+        self.rescan_seconds = settings.get('rescan_hours', 6) * 3600
+        self.retry_seconds = settings.get('retry_seconds', 300)
+        self.poll_seconds = settings.get('poll_seconds', 60)
+        self.max_watches = settings.get('max_watches', 8192)
+        self.scanner = Scanner(self.rules)
+        self.files = {}
+        self.expiry = []
+        self.watches = {}
+        self.watched_paths = {}
+        self.next_rescan = 0
+        self.stop_event = threading.Event()
+        self.inotify = inotify.Inotify()
+        self._watch_limit_logged = False
+
+    # -- model -------------------------------------------------------------
+
+    def could_qualify(self, path, name, size):
+        """Whether the file can become a candidate just by getting older"""
+        return (self.rules.could_match(os.path.dirname(path), name, size) and
+                not self.rules.is_protected_ext(name))
+
+    def track(self, path, name, size, mtime):
+        if not self.could_qualify(path, name, size):
+            self.files.pop(path, None)
+            return
+        if self.files.get(path) == mtime:
+            return
+        self.files[path] = mtime
+        min_age = self.rules.min_age_for(os.path.dirname(path))
+        heapq.heappush(self.expiry, (mtime + min_age, path, mtime))
+
+    def forget_tree(self, path):
+        """Drop tracked files and watches below a removed or moved directory"""
+        prefix = path + os.sep
+        for tracked in [p for p in self.files if p.startswith(prefix)]:
+            del self.files[tracked]
+        for watched in [p for p in self.watched_paths if p == path or p.startswith(prefix)]:
+            wd = self.watched_paths.pop(watched)
+            self.watches.pop(wd, None)
+            self.inotify.rm_watch(wd)
+
+    def watch(self, directory, state):
+        if directory in self.watched_paths:
+            return
+        if len(self.watches) >= self.max_watches:
+            if not self._watch_limit_logged:
+                logging.warning(f"Watch limit of {self.max_watches} directories reached; "
+                                f"further changes are picked up by the periodic rescan")
+                self._watch_limit_logged = True
+            return
+        try:
+            wd = self.inotify.add_watch(directory, WATCH_MASK)
+        except OSError as e:
+            logging.error(f"Error watching {directory}: {e}")
+            return
+        self.watches[wd] = (directory, state)
+        self.watched_paths[directory] = wd
+
+    def add_tree(self, directory, state):
+        """Watch a directory tree and track its files"""
+        stack = [(directory, state)]
+        while stack:
+            path, state = stack.pop()
+            # Watch first so files created while listing are not missed
+            self.watch(path, state)
+            files, subdirs = self.scanner.scan_dir(path, state)
+            for record in files:
+                self.track(record.path, record.name, record.size, record.mtime)
+            stack.extend(subdirs)
+
+    def compact(self):
+        self.expiry = [entry for entry in self.expiry if self.files.get(entry[1]) == entry[2]]
+        heapq.heapify(self.expiry)
+
+    def rescan(self):
+        """Rebuild the model from a full scan (consistency check)"""
+        started = time.perf_counter()
+        previous = self.files
+        self.files = {}
+        self.expiry = []
+        for root in self.roots:
+            state = self.scanner.root_state(root)
+            if state is not None:
+                self.add_tree(root, state)
+        missed = sum(1 for path, mtime in self.files.items() if previous.get(path) != mtime)
+        missed += sum(1 for path in previous if path not in self.files)
+        if previous:
+            logging.info(f"Rescan: {len(self.files)} files tracked, {missed} changes "
+                         f"missed by events ({time.perf_counter() - started:.2f}s)")
+        else:
+            logging.info(f"Tracking {len(self.files)} files in {len(self.watches)} directories "
+                         f"({time.perf_counter() - started:.2f}s)")
+        self.next_rescan = time.time() + self.rescan_seconds
+
+    # -- events ------------------------------------------------------------
+
+    def handle(self, wd, mask, name):
+        if mask & inotify.IN_Q_OVERFLOW:
+            logging.warning("inotify queue overflow; scheduling a full rescan")
+            self.next_rescan = 0
+            return
+        watched = self.watches.get(wd)
+        if watched is None:
+            return
+        directory, state = watched
+        if mask & (inotify.IN_IGNORED | inotify.IN_DELETE_SELF):
+            self.forget_tree(directory)
+            return
+        path = os.path.join(directory, name)
+        if mask & inotify.IN_ISDIR:
+            if mask & FILE_GONE:
+                self.forget_tree(path)
+            elif mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                if self.rules.is_excluded_dir(name):
+                    return
+                child_state = self.rules.enter_dir(state, name)
+                if child_state is not None:
+                    self.add_tree(path, child_state)
+            return
+        if mask & FILE_GONE:
+            self.files.pop(path, None)
+        elif mask & FILE_CHANGED:
+            try:
+                stats = os.stat(path, follow_symlinks=False)
+            except OSError:
+                self.files.pop(path, None)
+                return
+            if stat.S_ISREG(stats.st_mode):
+                self.track(path, name, stats.st_size, stats.st_mtime)
+
+    # -- expiry ------------------------------------------------------------
+
+    def expire(self, now):
+        """Delete (or report) every tracked file whose age crossed the limit"""
+        due = []
+        self.file_manager.safety_checker.in_use.begin_run()
+        while self.expiry and self.expiry[0][0] <= now:
+            _, path, mtime = heapq.heappop(self.expiry)
+            if self.files.get(path) != mtime:
+                continue
+            try:
+                record = FileRecord.from_path(path)
+            except OSError:
+                del self.files[path]
+                continue
+            if record.mtime != mtime:
+                self.files.pop(path)
+                self.track(path, record.name, record.size, record.mtime)
+                continue
+            if self.file_manager.is_candidate(record):
+                del self.files[path]
+                due.append(record)
+            else:
+                # In use or otherwise blocked right now: try again later
+                heapq.heappush(self.expiry, (now + self.retry_seconds, path, mtime))
+        if not due:
+            return 0
+        if self.dry_run:
+            self.file_manager.report_candidates(iter(due))
+        else:
+            self.file_manager.delete_candidates(iter(due))
+        return len(due)
+
+    def next_timeout(self, now):
+        deadline = min(self.next_rescan, now + self.poll_seconds)
+        if self.expiry:
+            deadline = min(deadline, self.expiry[0][0])
+        return max(0.0, deadline - now)
+
+    def run(self):
+        """Serve until stop() is called"""
+        self.file_manager.scan_roots = list(self.roots)
+        try:
+            while not self.stop_event.is_set():
+                now = time.time()
+                if now >= self.next_rescan:
+                    self.rescan()
+                    now = time.time()
+                for wd, mask, name in self.inotify.read_events(self.next_timeout(now)):
+                    self.handle(wd, mask, name)
+                self.expire(time.time())
+                if len(self.expiry) > 2 * len(self.files) + 1024:
+                    self.compact()
+        finally:
+            self.inotify.close()
+
+    def stop(self):
+        self.stop_event.set()
+        self.inotify.wake()
@@ -0,0 +1,438 @@
+import os
+import time
+import errno
+import queue
+import shutil
+import logging
+import threading
+import datetime
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DeletionStats:
+    """Throughput and latency counters for one deletion backend"""
+    __slots__ = ('files', 'bytes', 'errors', 'batches', 'busy_seconds',
+                 'max_batch_seconds', 'started', 'finished')
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+        self.max_batch_seconds = 0.0
+        self.started = None
+        self.finished = None
+
+    def record_batch(self, seconds, deleted, failed):
+        self.batches += 1
+        self.busy_seconds += seconds
+        self.max_batch_seconds = max(self.max_batch_seconds, seconds)
+        # A whole-directory record counts every file it removed
+        self.files += sum(getattr(record, 'files', 1) for record in deleted)
+        self.bytes += sum(record.size for record in deleted)
+        self.errors += len(failed)
+
+    @property
+    def wall_seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def as_dict(self):
+        wall = self.wall_seconds
+        attempts = self.files + self.errors
+        return {
+            'files': self.files,
+            'mb': round(self.bytes / (1024 * 1024), 2),
+            'errors': self.errors,
+            'batches': self.batches,
+            'wall_seconds': round(wall, 3),
+            'files_per_second': round(self.files / wall, 1) if wall else 0.0,
+            'avg_file_ms': round(self.busy_seconds * 1000 / attempts, 3) if attempts else 0.0,
+            'max_batch_ms': round(self.max_batch_seconds * 1000, 3),
+        }
+
+
+class DeletionBackend:
+    """Base class: delete a batch of FileRecords"""
+    name = 'base'
+
+    def delete_batch(self, records):
+        """Delete records; return (deleted records, [(record, error)])"""
+        deleted = []
+        failed = []
+        for record in records:
+            try:
+                self.delete_one(record)
+                deleted.append(record)
+            except Exception as e:
+                failed.append((record, e))
+        return deleted, failed
+
+    def delete_one(self, record):
+        raise NotImplementedError
+
+
+class UnlinkBackend(DeletionBackend):
+    """Permanently remove files.
+
+    Whole directories (TreeRecords) are renamed to a hidden sibling in one
+    step and removed by a background thread with shutil.rmtree, which uses
+    the dir-fd based scandir/unlinkat walk where the platform supports it.
+    """
+    name = 'unlink'
+
+    def __init__(self):
+        self._rmtree_pool = None
+        self._rmtree_futures = []
+        self._lock = threading.Lock()
+
+    def delete_one(self, record):
+        if getattr(record, 'files', None) is None:
+            os.unlink(record.path)
+            return
+        parent, name = os.path.split(record.path)
+        staging = os.path.join(parent, f'.{name}.cleanup-{os.getpid()}-{record.ino}')
+        os.rename(record.path, staging)
+        with self._lock:
+            if self._rmtree_pool is None:
+                self._rmtree_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rmtree')
+            self._rmtree_futures.append(self._rmtree_pool.submit(self._rmtree, staging))
+
+    @staticmethod
+    def _rmtree(path):
+        def onerror(function, failed_path, exc_info):
+            logging.error(f"Error removing {failed_path}: {exc_info[1]}")
+        shutil.rmtree(path, onerror=onerror)
+
+    def flush(self):
+        """Wait for background directory removals"""
+        with self._lock:
+            futures, self._rmtree_futures = self._rmtree_futures, []
+        for future in futures:
+            future.result()
+
+
+class Send2TrashBackend(DeletionBackend):
+    """Move files to the platform trash / Recycle Bin via send2trash"""
+    name = 'send2trash'
+
+    def __init__(self):
+        import send2trash
+        self._send2trash = send2trash.send2trash
+
+    def delete_batch(self, records):
+        try:
+            # send2trash accepts a list and handles it in one call
+            self._send2trash([record.path for record in records])
+            return list(records), []
+        except Exception:
+            # Part of the batch may already be gone; retry the rest one by
+            # one to find out which entries failed
+            remaining = [record for record in records if os.path.lexists(record.path)]
+            gone = [record for record in records if record not in remaining]
+            deleted, failed = super().delete_batch(remaining)
+            return gone + deleted, failed
+
+    def delete_one(self, record):
+        self._send2trash(record.path)
+
+
+def _find_mount_point(path):
+    path = os.path.realpath(path)
+    dev = os.lstat(path).st_dev
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path or os.lstat(parent).st_dev != dev:
+            return path
+        path = parent
+
+
+class FreedesktopTrashBackend(DeletionBackend):
+    """Trash implementation following the freedesktop.org trash spec.
+
+    Files on the home device go to ``$XDG_DATA_HOME/Trash``, files on other
+    mounts to ``$topdir/.Trash-$uid``. For each batch all ``.trashinfo``
+    files are written first (O_EXCL reserves the name), then every file is
+    renamed into place, so the trash never contains a file without info.
+    """
+    name = 'freedesktop'
+
+    def __init__(self, home_trash=None):
+        data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+        self.home_trash = home_trash or os.path.join(data_home, 'Trash')
+        self._trash_by_dev = {}
+        self._lock = threading.Lock()
+
+    def _trash_dir(self, path):
+        dev = os.lstat(path).st_dev
+        with self._lock:
+            trash = self._trash_by_dev.get(dev)
+            if trash is None:
+                os.makedirs(self.home_trash, exist_ok=True)
+                if os.stat(self.home_trash).st_dev == dev:
+                    trash = self.home_trash
+                else:
+                    trash = os.path.join(_find_mount_point(path), f'.Trash-{os.getuid()}')
+                for sub in ('files', 'info'):
+                    os.makedirs(os.path.join(trash, sub), mode=0o700, exist_ok=True)
+                self._trash_by_dev[dev] = trash
+        return trash
+
+    def _reserve_info(self, trash, record, deletion_date):
+        base = record.name
+        counter = 0
+        while True:
+            name = base if counter == 0 else f'{base}.{counter}'
+            info_path = os.path.join(trash, 'info', name + '.trashinfo')
+            try:
+                fd = os.open(info_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                counter += 1
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(f"[Trash Info]\nPath={quote(os.path.abspath(record.path))}\n"
+                        f"DeletionDate={deletion_date}\n")
+            return name, info_path
+
+    def delete_batch(self, records):
+        deletion_date = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+        reserved = []
+        failed = []
+        for record in records:
+            try:
+                trash = self._trash_dir(record.path)
+                name, info_path = self._reserve_info(trash, record, deletion_date)
+                reserved.append((record, os.path.join(trash, 'files', name), info_path))
+            except Exception as e:
+                failed.append((record, e))
+
+        deleted = []
+        for record, target, info_path in reserved:
+            try:
+                os.rename(record.path, target)
+                deleted.append(record)
+            except Exception as e:
+                # The file stays where it was; a leftover .trashinfo is only cosmetic
+                try:
+                    os.unlink(info_path)
+                except OSError as unlink_error:
+                    logging.error(f"Error removing {info_path}: {unlink_error}")
+                failed.append((record, e))
+        return deleted, failed
+
+
+class QuarantineBackend(DeletionBackend):
+    """Move files into a quarantine directory instead of deleting them.
+
+    Files keep their inode (rename on the same device, copy otherwise) and
+    the original location is appended to ``MANIFEST`` for restores. The
+    target name is reserved with O_EXCL (mkdir for trees) before the move,
+    so an existing quarantined entry is never overwritten.
+    """
+    name = 'quarantine'
+
+    def __init__(self, quarantine_dir):
+        self.quarantine_dir = os.path.abspath(quarantine_dir)
+        os.makedirs(self.quarantine_dir, exist_ok=True)
+        self._manifest_lock = threading.Lock()
+
+    def _reserve(self, record, tree):
+        """Create an empty placeholder under a free name and return its path"""
+        base = f'{record.dev}-{record.ino}-{record.name}' if record.ino else record.name
+        counter = 0
+        while True:
+            name = base if counter == 0 else f'{base}.{counter}'
+            target = os.path.join(self.quarantine_dir, name)
+            try:
+                if tree:
+                    os.mkdir(target, 0o700)
+                else:
+                    os.close(os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+            except FileExistsError:
+                counter += 1
+                continue
+            return target
+
+    @staticmethod
+    def _release(target, tree):
+        """Remove an unused placeholder"""
+        try:
+            if tree:
+                os.rmdir(target)
+            else:
+                os.unlink(target)
+        except OSError as e:
+            logging.error(f"Error removing {target}: {e}")
+
+    def delete_batch(self, records):
+        deleted = []
+        failed = []
+        moves = []
+        for record in records:
+            tree = getattr(record, 'files', None) is not None
+            try:
+                target = self._reserve(record, tree)
+                try:
+                    # Replaces the empty placeholder (file or directory)
+                    os.replace(record.path, target)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        self._release(target, tree)
+                        raise
+                    if tree:
+                        shutil.copytree(record.path, target, symlinks=True, dirs_exist_ok=True)
+                        shutil.rmtree(record.path)
+                    else:
+                        shutil.move(record.path, target)
+                deleted.append(record)
+                moves.append(f"{target}\t{record.path}\n")
+            except Exception as e:
+                failed.append((record, e))
+        if moves:
+            with self._manifest_lock:
+                with open(os.path.join(self.quarantine_dir, 'MANIFEST'), 'a') as f:
+                    f.writelines(moves)
+        return deleted, failed
+
+
+def _tree_changed(record):
+    """For whole-directory records, an error if the tree changed since the scan
+
+    Every directory of the tree is compared with its scanned mtime. A file
+    created between this check and the rename is still removed with the
+    tree, and in-place writes to existing files do not change any
+    directory mtime.
+    """
+    if getattr(record, 'files', None) is None:
+        return None
+    return record.changed()
+
+
+def create_backend(config):
+    """Build the deletion backend selected in the config"""
+    deletion = config.get('deletion', {})
+    backend = deletion.get('backend', 'auto')
+    if backend == 'auto':
+        backend = 'send2trash' if config['recycle_bin']['use_recycle_bin'] else 'unlink'
+    if backend == 'unlink':
+        return UnlinkBackend()
+    if backend == 'send2trash':
+        return Send2TrashBackend()
+    if backend == 'freedesktop':
+        return FreedesktopTrashBackend(deletion.get('trash_dir'))
+    if backend == 'quarantine':
+        from src.utils.locations import resolve_config_path
+        quarantine_dir = deletion.get('quarantine_dir', 'quarantine')
+        return QuarantineBackend(resolve_config_path(config, quarantine_dir))
+    if backend == 'async':
+        from src.utils.async_io import AsyncUnlinkBackend, MountLimits
+        return AsyncUnlinkBackend(MountLimits.from_config(config))
+    raise ValueError(f"Unknown deletion backend: {backend}")
+
+
+class DeletionPipeline:
+    """Bounded queue drained in batches by a pool of deleter threads.
+
+    The scanner only blocks when the queue is full, so deletion latency no
+    longer stalls traversal. ``on_result(record, error)`` is called from the
+    worker threads for every processed record (error is None on success);
+    exceptions it raises are logged and do not stop the worker.
+    """
+
+    def __init__(self, backend, workers=2, batch_size=64, queue_size=1024, on_result=None,
+                 throttle=None):
+        self.backend = backend
+        self.throttle = throttle
+        self.batch_size = batch_size
+        self.on_result = on_result
+        self.stats = DeletionStats()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stats_lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._worker, daemon=True,
+                                          name=f"deleter-{i}")
+                         for i in range(max(1, workers))]
+        self._closed = False
+        self.stats.started = time.perf_counter()
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, record):
+        self._queue.put(record)
+
+    def _worker(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            batch = [record]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        stale, fresh = [], []
+        for record in batch:
+            error = _tree_changed(record)
+            if error is None:
+                fresh.append(record)
+            else:
+                stale.append((record, error))
+        if self.throttle is not None:
+            self._acquire(fresh)
+            started = time.perf_counter()
+        try:
+            deleted, failed = self.backend.delete_batch(fresh)
+        except Exception as e:
+            deleted, failed = [], [(record, e) for record in fresh]
+        failed = stale + failed
+        elapsed = time.perf_counter() - started
+        if self.throttle is not None and fresh:
+            for dev in {record.dev for record in fresh}:
+                self.throttle.observe(dev, elapsed / len(fresh))
+        with self._stats_lock:
+            self.stats.record_batch(elapsed, deleted, failed)
+        if self.on_result is not None:
+            results = [(record, None) for record in deleted] + failed
+            for record, error in results:
+                # A failing callback must not kill the worker: with every
+                # worker gone, submit() and close() would block forever
+                try:
+                    self.on_result(record, error)
+                except Exception as e:
+                    logging.error(f"Error reporting result for {record.path}: {e}")
+
+    def _acquire(self, batch):
+        """Wait for the per-device ops/bytes budget of a batch"""
+        by_device = {}
+        for record in batch:
+            ops, nbytes = by_device.get(record.dev, (0, 0))
+            by_device[record.dev] = (ops + getattr(record, 'files', 1), nbytes + record.size)
+        for dev, (ops, nbytes) in by_device.items():
+            self.throttle.acquire(dev, ops, nbytes)
+
+    def close(self):
+        """Wait for queued deletions to finish and return the stats"""
+        if not self._closed:
+            self._closed = True
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join()
+            if hasattr(self.backend, 'flush'):
+                self.backend.flush()
+            self.stats.finished = time.perf_counter()
+        return self.stats
@@ -0,0 +1,172 @@
+import os
+import mmap
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.scanner import Scanner
+
+
+class DuplicateStats:
+    """Counters for one duplicate search"""
+    __slots__ = ('files', 'size_candidates', 'partial_hashed', 'full_hashed',
+                 'bytes_read', 'duplicates', 'duplicate_bytes', 'errors')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class DuplicateFinder:
+    """Find files with identical content and yield the redundant copies.
+
+    Work is staged so that most files are never read:
+
+    1. group by size (from the scan, no I/O); unique sizes drop out
+    2. BLAKE2 of the first and last ``chunk_size_kb`` of each remaining
+       file; for files no larger than two chunks this already is the
+       whole content
+    3. full BLAKE2 only for files that still collide, read through mmap
+       above ``mmap_threshold_mb`` and in large buffered chunks below
+
+    Hashing runs on a thread pool (hashlib releases the GIL for large
+    updates). Hard links of the same inode are not duplicates and are
+    counted once. Per group the copy chosen by ``keep`` survives; the
+    others are yielded as FileRecords for the normal deletion path.
+    """
+
+    READ_SIZE = 1024 * 1024
+
+    def __init__(self, config, safety_checker):
+        settings = config.get('duplicates', {})
+        self.min_size = int(settings.get('min_size_kb', 4) * 1024)
+        self.chunk_size = int(settings.get('chunk_size_kb', 64) * 1024)
+        self.mmap_threshold = int(settings.get('mmap_threshold_mb', 8) * 1024 * 1024)
+        self.workers = max(1, settings.get('hash_workers', 4))
+        self.keep = settings.get('keep', 'oldest')
+        if self.keep not in ('oldest', 'newest', 'shortest_path'):
+            raise ValueError(f"Unknown duplicates.keep: {self.keep}")
+        self.safety_checker = safety_checker
+        self.rules = safety_checker.rules
+        self.scanner = Scanner(self.rules)
+        self.stats = DuplicateStats()
+
+    # -- hashing -----------------------------------------------------------
+
+    def partial_hash(self, record):
+        """Hash of the first and last chunk (the whole file if it is small)"""
+        h = hashlib.blake2b(digest_size=16)
+        try:
+            with open(record.path, 'rb') as f:
+                data = f.read(self.chunk_size)
+                h.update(data)
+                if record.size > 2 * self.chunk_size:
+                    f.seek(-self.chunk_size, os.SEEK_END)
+                    h.update(f.read(self.chunk_size))
+                elif record.size > self.chunk_size:
+                    h.update(f.read())
+            return h.digest()
+        except OSError as e:
+            logging.error(f"Error hashing {record.path}: {e}")
+            return None
+
+    def full_hash(self, record):
+        """BLAKE2 of the whole file"""
+        h = hashlib.blake2b()
+        try:
+            with open(record.path, 'rb') as f:
+                if record.size >= self.mmap_threshold:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                        h.update(m)
+                else:
+                    buffer = bytearray(self.READ_SIZE)
+                    view = memoryview(buffer)
+                    while True:
+                        n = f.readinto(buffer)
+                        if not n:
+                            break
+                        h.update(view[:n])
+            return h.digest()
+        except (OSError, ValueError) as e:
+            logging.error(f"Error hashing {record.path}: {e}")
+            return None
+
+    def _regroup(self, pool, groups, hash_function, read_limit):
+        """Split each group by hash_function; keep only groups with collisions"""
+        records = [record for group in groups for record in group]
+        digests = pool.map(hash_function, records, chunksize=16)
+        buckets = {}
+        for record, digest in zip(records, digests):
+            if digest is None:
+                self.stats.errors += 1
+                continue
+            self.stats.bytes_read += min(record.size, read_limit)
+            buckets.setdefault((record.size, digest), []).append(record)
+        return [group for group in buckets.values() if len(group) > 1]
+
+    # -- search ------------------------------------------------------------
+
+    def group_by_size(self, roots):
+        """Scan roots and return size groups with more than one inode"""
+        by_size = {}
+        seen = set()
+        for root in roots:
+            for record in self.scanner.walk(root):
+                self.stats.files += 1
+                if record.size < self.min_size or self.rules.is_protected_ext(record.name):
+                    continue
+                key = (record.dev, record.ino)
+                if key in seen:
+                    continue
+                seen.add(key)
+                by_size.setdefault(record.size, []).append(record)
+        groups = [group for group in by_size.values() if len(group) > 1]
+        self.stats.size_candidates = sum(len(group) for group in groups)
+        return groups
+
+    def find_groups(self, roots):
+        """Return lists of records with identical content"""
+        groups = self.group_by_size(roots)
+        if not groups:
+            return []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hash') as pool:
+            self.stats.partial_hashed = sum(len(group) for group in groups)
+            groups = self._regroup(pool, groups, self.partial_hash, 2 * self.chunk_size)
+            small = [group for group in groups if group[0].size <= 2 * self.chunk_size]
+            large = [group for group in groups if group[0].size > 2 * self.chunk_size]
+            self.stats.full_hashed = sum(len(group) for group in large)
+            return small + self._regroup(pool, large, self.full_hash, float('inf'))
+
+    def keeper(self, group):
+        if self.keep == 'newest':
+            return max(group, key=lambda record: record.mtime)
+        if self.keep == 'shortest_path':
+            return min(group, key=lambda record: (len(record.path), record.path))
+        return min(group, key=lambda record: record.mtime)
+
+    def iter_duplicates(self, roots):
+        """Yield the redundant copies of every duplicate group"""
+        now = time.time()
+        for group in self.find_groups(roots):
+            keeper = self.keeper(group)
+            for record in group:
+                min_age = self.rules.min_age_for(os.path.dirname(record.path))
+                if record is keeper or now - record.mtime < min_age:
+                    continue
+                if not self.safety_checker.is_safe_record(record):
+                    continue
+                record.reason = f"duplicate of {keeper.path}"
+                self.stats.duplicates += 1
+                self.stats.duplicate_bytes += record.size
+                yield record
+
+    def log_summary(self):
+        stats = self.stats
+        logging.info(f"Duplicate search: {stats.files} files, {stats.size_candidates} with a shared size, "
+                     f"{stats.partial_hashed} partially and {stats.full_hashed} fully hashed "
+                     f"({stats.bytes_read / (1024 * 1024):.2f} MB read)")
+        logging.info(f"Found {stats.duplicates} redundant copies "
+                     f"({stats.duplicate_bytes / (1024 * 1024):.2f} MB)")
@@ -1,67 +1,339 @@
 import os
-import datetime
-import send2trash
+import time
 import logging
 from pathlib import Path
+from collections import deque
+from src.utils.scanner import Scanner
+from src.utils.parallel_scanner import ParallelScanner
+from src.utils.subtree import SubtreeScanner
+from src.utils.throttle import IOThrottle
+from src.utils.deleters import DeletionPipeline, create_backend
+from src.utils.selection import TopKSelector
+from src.utils.log_setup import FileEventLog
+
+_worker_file_manager = None
+
+def _init_filter_worker(config):
+    """Build the per-process FileManager used for filtering batches"""
+    global _worker_file_manager
+    from src.utils.safety_checker import SafetyChecker
+    _worker_file_manager = FileManager(config, SafetyChecker(config))
+
+def _filter_batch(batch):
+    """Return the records of a batch that are deletion candidates"""
+    return [record for record in batch if _worker_file_manager.is_candidate(record)]
+
+def _within_budget(candidates, byte_budget):
+    """Pass records through until byte_budget bytes have been handed out"""
+    if byte_budget is None:
+        yield from candidates
+        return
+    handed_out = 0
+    try:
+        for record in candidates:
+            if handed_out >= byte_budget:
+                break
+            handed_out += record.size
+            yield record
+    finally:
+        # Stop a lazy scan instead of letting it run to the end
+        if hasattr(candidates, 'close'):
+            candidates.close()
 
 class FileManager:
     def __init__(self, config, safety_checker):
         self.config = config
         self.safety_checker = safety_checker
+        self.rules = safety_checker.rules
+        self.backend = create_backend(config)
+        self.deletion_stats = None
+        self.remove_empty_dirs = config['cleanup'].get('remove_empty_dirs', False)
+        self.scan_roots = []
+        self.events = FileEventLog(config)
+        # Built on first use; hashing and sqlite are only imported when needed
+        self.duplicates = None
+        self.priority = TopKSelector.from_config(config)
+        self.selector = self.priority or TopKSelector.from_config(config, default_order='size')
+        scan_config = config.get('scan', {})
+        self.workers = scan_config.get('workers', 1)
+        self.filter_processes = scan_config.get('filter_processes', 0)
+        self.index_path = scan_config.get('index_path')
+        self.bulk_subtrees = config['cleanup'].get('bulk_delete_subtrees', False)
+        if self.bulk_subtrees:
+            # Needs post-order knowledge of each subtree, so it always runs
+            # on the sequential walker
+            self.scanner = SubtreeScanner(self.rules, self.is_candidate)
+        elif self.index_path:
+            # The SQLite index is written from the walking thread, so an
+            # indexed scan is always sequential
+            from src.utils.scan_index import IndexedScanner
+            self.scanner = IndexedScanner(self.index_path, config, self.rules,
+                                          scan_config.get('index_full_rescan_hours', 24))
+        elif config.get('async_io', {}).get('scan', False):
+            # asyncio is only imported for network shares that need it
+            from src.utils.async_io import AsyncScanner
+            self.scanner = AsyncScanner.from_config(config, rules=self.rules)
+        elif self.workers > 1:
+            self.scanner = ParallelScanner(self.workers, rules=self.rules,
+                                           device_lanes=scan_config.get('device_lanes', True))
+        else:
+            self.scanner = Scanner(rules=self.rules)
+        self.throttle = IOThrottle.from_config(config)
+        if self.throttle is not None:
+            # IndexedScanner walks changed directories with an inner Scanner
+            walker = getattr(self.scanner, 'scanner', self.scanner)
+            walker.throttle = self.throttle
         
-    def should_delete_file(self, file_path):
-        """Check if file meets deletion criteria"""
+    def should_delete_file(self, file_path, stats=None):
+        """Check if file meets deletion criteria
+
+        ``stats`` may be an already available stat result (for example the
+        one cached on a DirEntry) so no extra stat() is issued.
+        """
         try:
-            stats = Path(file_path).stat()
-            
-            # Check file age
-            file_age = datetime.datetime.now() - datetime.datetime.fromtimestamp(stats.st_mtime)
-            if file_age.days < self.config['cleanup']['min_file_age_days']:
-                return False
-                
-            # Check file size
-            file_size_mb = stats.st_size / (1024 * 1024)
-            if file_size_mb < self.config['cleanup']['min_size_mb']:
-                return False
-                
-            # Check extension
-            if not any(str(file_path).lower().endswith(ext) 
-                      for ext in self.config['cleanup']['target_extensions']):
-                return False
-                
-            return True
+            if stats is None:
+                stats = Path(file_path).stat()
+            return self._matches_rules(str(file_path), stats.st_size, stats.st_mtime)
             
         except Exception as e:
             logging.error(f"Error checking file {file_path}: {e}")
             return False
 
+    def _matches_rules(self, file_path, size, mtime):
+        """Apply age, size and extension rules to already known stat values"""
+        directory, name = os.path.split(file_path)
+        return self.rules.path_reason(directory, name, size, mtime, time.time()) is not None
+
+    def match_reason(self, record):
+        """Age, size and extension rules for a FileRecord; returns reason or None"""
+        return self.rules.path_reason(os.path.dirname(record.path), record.name,
+                                      record.size, record.mtime, time.time())
+
+    def instrument(self, metrics):
+        """Time rule checks, directory scans, deletions and per-file logging"""
+        metrics.instrument(self, 'should_delete_file', 'rule_check')
+        metrics.instrument(self, 'match_reason', 'rule_check')
+        metrics.instrument(self.backend, 'delete_batch', 'delete_batch')
+        metrics.instrument(self.events, 'event', 'log')
+        if isinstance(self.scanner, ParallelScanner):
+            self.scanner.metrics = metrics
+        else:
+            metrics.instrument(getattr(self.scanner, 'scanner', self.scanner), 'scan_dir', 'walk_dir')
+
+    def is_candidate(self, record):
+        """Check a scanned FileRecord against safety and deletion rules
+
+        On success the matched rule is stored in ``record.reason``.
+        """
+        reason = self.match_reason(record)
+        if reason is None or not self.safety_checker.is_safe_record(record):
+            return False
+        record.reason = reason
+        return True
+
+    def iter_candidates(self, *directories):
+        """Yield FileRecords below the given directories that would be deleted"""
+        self.safety_checker.in_use.begin_run()
+        self.scan_roots = [os.path.abspath(directory) for directory in directories]
+        if self.bulk_subtrees:
+            # Records were already evaluated while the subtrees were checked
+            for directory in directories:
+                yield from self.scanner.walk(directory)
+            return
+        if self.filter_processes > 0 and not self.index_path:
+            yield from self._iter_candidates_multiprocess(directories)
+            return
+        if isinstance(self.scanner, ParallelScanner):
+            records = self.scanner.walk_all(directories)
+        else:
+            records = (record for directory in directories
+                       for record in self.scanner.walk(directory))
+        for record in records:
+            if self.is_candidate(record):
+                yield record
+
+    def iter_duplicates(self, *directories):
+        """Yield redundant copies of identical files below the given directories"""
+        self.safety_checker.in_use.begin_run()
+        self.scan_roots = [os.path.abspath(directory) for directory in directories]
+        if self.duplicates is None:
+            from src.utils.duplicates import DuplicateFinder
+            self.duplicates = DuplicateFinder(self.config, self.safety_checker)
+        yield from self.duplicates.iter_duplicates(directories)
+
+    def _iter_candidates_multiprocess(self, directories):
+        """Filter scanned batches in a process pool (CPU heavy rule sets)"""
+        scanner = self.scanner
+        if not isinstance(scanner, ParallelScanner):
+            scanner = self.scanner = ParallelScanner(1, rules=self.rules)
+            scanner.throttle = self.throttle
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=self.filter_processes,
+                                 initializer=_init_filter_worker,
+                                 initargs=(self.config,)) as pool:
+            # Keep only a few batches in flight; Executor.map would submit
+            # the whole scan up front
+            in_flight = deque()
+            for batch in scanner.walk_batches(directories):
+                in_flight.append(pool.submit(_filter_batch, batch))
+                if len(in_flight) >= 2 * self.filter_processes:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+
+    def delete_file(self, record):
+        """Delete a single file with the configured backend"""
+        deleted, failed = self.backend.delete_batch([record])
+        if failed:
+            raise failed[0][1]
+
+    def create_pipeline(self, on_result=None):
+        """Start a batched deletion pipeline for the configured backend"""
+        deletion = self.config.get('deletion', {})
+        return DeletionPipeline(self.backend,
+                                workers=deletion.get('workers', 2),
+                                batch_size=deletion.get('batch_size', 64),
+                                queue_size=deletion.get('queue_size', 1024),
+                                on_result=on_result,
+                                throttle=self.throttle)
+
     def clean_directory(self, directory):
         """Clean a single directory"""
-        cleaned_size = 0
-        files_cleaned = 0
-        
+        return self.clean_directories([directory])
+
+    def clean_directories(self, directories):
+        """Clean several directories in one (possibly parallel) scan"""
+        return self.delete_candidates(self.iter_candidates(*directories))
+
+    def delete_candidates(self, candidates, byte_budget=None):
+        """Delete every record produced by a candidate stream
+
+        Candidates are handed to a DeletionPipeline, so the scan keeps going
+        while deleter threads work through the queue. With ``byte_budget``
+        the stream is abandoned once that many bytes have been submitted.
+        """
+        def on_result(record, error):
+            if error is None:
+                self.events.event('deleted', record)
+            else:
+                self.events.event('failed', record, error)
+
+        # Pre-run mtimes of every directory we delete from, captured before
+        # the first deletion there changes it
+        touched = {} if self.remove_empty_dirs else None
+        pipeline = self.create_pipeline(on_result)
         try:
-            for item in Path(directory).rglob('*'):
-                if (item.is_file() and 
-                    self.safety_checker.is_safe_to_delete(item) and 
-                    self.should_delete_file(item)):
-                    
-                    size_mb = item.stat().st_size / (1024 * 1024)
-                    
-                    try:
-                        if self.config['recycle_bin']['use_recycle_bin']:
-                            send2trash.send2trash(str(item))
-                        else:
-                            item.unlink()
-                            
-                        cleaned_size += size_mb
-                        files_cleaned += 1
-                        logging.info(f"Cleaned: {item} ({size_mb:.2f} MB)")
-                        
-                    except Exception as e:
-                        logging.error(f"Error deleting {item}: {e}")
+            for record in _within_budget(candidates, byte_budget):
+                if touched is not None:
+                    parent = os.path.dirname(record.path)
+                    if parent not in touched:
+                        try:
+                            touched[parent] = os.stat(parent).st_mtime
+                        except OSError:
+                            pass
+                pipeline.submit(record)
                         
         except Exception as e:
-            logging.error(f"Error cleaning directory {directory}: {e}")
+            logging.error(f"Error during cleanup: {e}")
             
-        return cleaned_size, files_cleaned
\ No newline at end of file
+        finally:
+            stats = pipeline.close()
+            self.deletion_stats = stats
+            
+        if touched:
+            self.remove_empty_directories(touched)
+            
+        return stats.bytes / (1024 * 1024), stats.files
+
+    def remove_empty_directories(self, touched):
+        """Bottom-up removal of directories emptied by this run
+
+        ``touched`` maps directories files were deleted from to their
+        mtime before the run. A directory goes only if it is now empty,
+        lies strictly below a scan root, is not protected and was at least
+        ``min_file_age_days`` old; parents emptied as a result follow.
+        """
+        # Scan roots and record paths may be relative; compare absolute forms
+        roots = {os.path.abspath(root) for root in self.scan_roots}
+        touched = {os.path.abspath(path): mtime for path, mtime in touched.items()}
+        now = time.time()
+        removed = 0
+        for path in sorted(touched, key=lambda p: p.count(os.sep), reverse=True):
+            mtime = touched[path]
+            while True:
+                parent = os.path.dirname(path)
+                if (path in roots or
+                        not any(path.startswith(root.rstrip(os.sep) + os.sep) for root in roots) or
+                        now - mtime < self.rules.min_age_for(path) or
+                        self.rules.is_protected_dir(path)):
+                    break
+                try:
+                    parent_mtime = os.stat(parent).st_mtime
+                    os.rmdir(path)
+                except OSError:
+                    break
+                removed += 1
+                logging.info(f"Removed empty directory: {path}")
+                if parent in touched:
+                    # Handled on its own turn with its pre-run mtime
+                    break
+                path, mtime = parent, parent_mtime
+        if removed:
+            logging.info(f"Removed {removed} empty directories")
+        return removed
+
+    def report_candidates(self, candidates, byte_budget=None):
+        """Log every record of a candidate stream without deleting it"""
+        total_size = 0
+        count = 0
+        try:
+            for record in _within_budget(candidates, byte_budget):
+                total_size += record.size
+                count += getattr(record, 'files', 1)
+                self.events.event('would_delete', record)
+        except Exception as e:
+            logging.error(f"Error during dry run: {e}")
+        return total_size / (1024 * 1024), count
+
+    def rank_candidates(self, candidates):
+        """Return the top-K candidates, most reclaimable first"""
+        return self.selector.select(candidates)
+
+    def clean_prioritized(self, candidate_source, dry_run=True, byte_budget=None):
+        """Delete the top K candidates first, then the rest in scan order
+
+        ``candidate_source`` returns a fresh candidate stream. The first
+        scan keeps only the top K in memory and deletes them (waiting for
+        the pipeline to drain). If candidates fell outside the top K and
+        the budget is not met yet, one more scan deletes whatever is left
+        as it streams past, so a run never takes more than two scans. A
+        dry run only reports the top K.
+        """
+        ranked = self.rank_candidates(candidate_source())
+        if dry_run:
+            size, count = self.report_candidates(ranked, byte_budget)
+        else:
+            size, count = self.delete_candidates(ranked, byte_budget)
+        if self.selector.dropped:
+            logging.info(f"{self.selector.dropped} more candidates beyond the top "
+                         f"{self.selector.k} ({self.selector.order} order)")
+        total_bytes = int(size * 1024 * 1024)
+        if (dry_run or not self.selector.dropped or
+                (byte_budget is not None and total_bytes >= byte_budget)):
+            return size, count
+
+        budget = None if byte_budget is None else byte_budget - total_bytes
+        logging.info("Deleting the remaining candidates in scan order")
+        rest_size, rest_count = self.delete_candidates(candidate_source(), budget)
+        return size + rest_size, count + rest_count
+
+    def log_deletion_report(self):
+        """Log throughput and latency of the last cleanup"""
+        if self.deletion_stats is None:
+            return
+        report = self.deletion_stats.as_dict()
+        logging.info(f"Deletion backend '{self.backend.name}': {report['files']} files "
+                     f"({report['mb']:.2f} MB), {report['errors']} errors, "
+                     f"{report['files_per_second']:.1f} files/s, "
+                     f"avg {report['avg_file_ms']:.3f} ms/file, "
+                     f"max batch {report['max_batch_ms']:.1f} ms")
\ No newline at end of file
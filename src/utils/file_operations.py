@@ -1,48 +1,54 @@
 import os
-import datetime
-from pathlib import Path
-import send2trash
 import logging
+from src.utils.rules import PathTrie
+from src.utils.safety_checker import SafetyChecker
+from src.utils.file_manager import FileManager
+
+# Thin compatibility layer over SafetyChecker/FileManager: both helpers go
+# through the same compiled rules and single-stat scan as CleanupAgent.
+
+CRITICAL_PATHS = ['Windows', 'Program Files', 'Program Files (x86)']
+
+_critical_paths = PathTrie(CRITICAL_PATHS)
 
 def is_safe_to_delete(file_path):
     """Check if file is safe to delete"""
     try:
-        critical_paths = ['Windows', 'Program Files', 'Program Files (x86)']
-        return not any(cp.lower() in str(file_path).lower() for cp in critical_paths)
+        return not _critical_paths.matches(os.path.dirname(os.path.abspath(file_path)))
     except Exception:
         return False
 
-def clean_folder(folder_path, days_threshold, min_file_size_mb, file_extensions):
-    """Clean a single folder based on age threshold"""
-    cleaned_size = 0
-    files_cleaned = 0
-    current_time = datetime.datetime.now()
-    
+def make_config(days_threshold, min_file_size_mb, file_extensions, use_recycle_bin=True):
+    """Build an engine config equivalent to the clean_folder() arguments"""
+    return {
+        'safety': {
+            'protected_directories': list(CRITICAL_PATHS),
+            'protected_extensions': []
+        },
+        'cleanup': {
+            'min_file_age_days': days_threshold,
+            'min_size_mb': min_file_size_mb,
+            'target_extensions': list(file_extensions)
+        },
+        'recycle_bin': {
+            'use_recycle_bin': use_recycle_bin
+        }
+    }
+
+def clean_folder(folder_path, days_threshold, min_file_size_mb, file_extensions,
+                 use_recycle_bin=True):
+    """Clean a single folder based on age threshold
+
+    Files at least ``days_threshold`` days old are removed, the same rule
+    FileManager applies for ``min_file_age_days``.
+    """
     try:
-        folder = Path(folder_path)
-        if not folder.exists():
+        if not os.path.exists(folder_path):
             return 0, 0
+        config = make_config(days_threshold, min_file_size_mb, file_extensions, use_recycle_bin)
+        file_manager = FileManager(config, SafetyChecker(config))
+        return file_manager.clean_directory(folder_path)
 
-        for item in folder.rglob('*'):
-            try:
-                if item.is_file() and is_safe_to_delete(item):
-                    file_age = datetime.datetime.fromtimestamp(item.stat().st_mtime)
-                    days_old = (current_time - file_age).days
-                    file_size_mb = item.stat().st_size / (1024 * 1024)
-                    
-                    if (days_old > days_threshold and 
-                        file_size_mb >= min_file_size_mb and
-                        any(str(item).lower().endswith(ext.lower()) 
-                            for ext in file_extensions)):
-                        cleaned_size += file_size_mb
-                        files_cleaned += 1
-                        send2trash.send2trash(str(item))
-                        logging.info(f"Cleaned: {item} ({file_size_mb:.2f} MB)")
-                        
-            except Exception as e:
-                logging.error(f"Error processing {item}: {e}")
-                
     except Exception as e:
         logging.error(f"Error cleaning folder {folder_path}: {e}")
-        
-    return cleaned_size, files_cleaned
\ No newline at end of file
+        return 0, 0
@@ -0,0 +1,106 @@
+import os
+import sys
+
+
+def resolve_root(path, home=None):
+    """Absolute, resolved form of a configured folder (relative to home)"""
+    home = home or os.path.expanduser('~')
+    path = os.path.join(home, os.path.expanduser(os.path.expandvars(path)))
+    return os.path.realpath(path)
+
+
+def resolve_config_path(config, path):
+    """Absolute form of a path setting; relative paths are taken relative to
+    the settings file's directory (``config_dir``), not the working directory"""
+    path = os.path.expanduser(os.path.expandvars(path))
+    return os.path.abspath(os.path.join(config.get('config_dir', ''), path))
+
+
+def dedupe_roots(paths):
+    """Existing directories, resolved, without duplicates or nested roots
+
+    A root that lies inside another root is dropped since the outer walk
+    covers it already. Input order is kept.
+    """
+    resolved = []
+    for path in paths:
+        if not path:
+            continue
+        real = os.path.realpath(os.path.expandvars(os.path.expanduser(path)))
+        if os.path.isdir(real) and real not in resolved:
+            resolved.append(real)
+    return [path for path in resolved
+            if not any(path.startswith(other.rstrip(os.sep) + os.sep)
+                       for other in resolved if other != path)]
+
+
+class LocationProvider:
+    """Resolve the ``locations`` config to scan roots for this platform
+
+    - ``temp_cleanup``: TMPDIR/TEMP/TMP, tempfile.gettempdir() and
+      %WINDIR%\\Temp on Windows, /tmp and /var/tmp elsewhere
+    - ``cache_cleanup``: XDG_CACHE_HOME (~/.cache), ~/Library/Caches on macOS
+    - ``custom_folders``: absolute, or relative to the home directory
+    - ``download_cleanup``: ~/Downloads
+    - ``policies``: the ``roots`` of every per-location policy
+    """
+
+    def __init__(self, config):
+        self.locations = config.get('locations', {})
+        self.policies = config.get('policies', [])
+        self.home = os.path.expanduser('~')
+
+    def temp_dirs(self):
+        dirs = [os.environ.get(name) for name in ('TMPDIR', 'TEMP', 'TMP')]
+        if sys.platform == 'win32':
+            import tempfile
+            dirs.insert(0, tempfile.gettempdir())
+            windir = os.environ.get('WINDIR') or os.environ.get('SystemRoot')
+            if windir:
+                dirs.append(os.path.join(windir, 'Temp'))
+        else:
+            # tempfile.gettempdir()'s own candidate list, without importing
+            # tempfile (and random) on the CLI's fast path
+            dirs.extend(['/tmp', '/var/tmp'])
+        return dirs
+
+    def cache_dirs(self):
+        if sys.platform == 'win32':
+            # Browser and system caches are listed in custom_folders
+            return []
+        if sys.platform == 'darwin':
+            return [os.path.join(self.home, 'Library', 'Caches')]
+        return [os.environ.get('XDG_CACHE_HOME') or os.path.join(self.home, '.cache')]
+
+    def custom_dirs(self):
+        return [os.path.join(self.home, os.path.expanduser(folder))
+                for folder in self.locations.get('custom_folders', [])]
+
+    def policy_dirs(self):
+        """Roots of the per-location ``policies``"""
+        return [resolve_root(root, self.home)
+                for policy in self.policies for root in policy.get('roots', [])]
+
+    def download_dirs(self):
+        return [os.path.join(self.home, 'Downloads')]
+
+    def scan_roots(self):
+        """Roots for the regular cleanup run"""
+        dirs = []
+        if self.locations.get('temp_cleanup', True):
+            dirs.extend(self.temp_dirs())
+        if self.locations.get('cache_cleanup', False):
+            dirs.extend(self.cache_dirs())
+        dirs.extend(self.custom_dirs())
+        if self.locations.get('download_cleanup', False):
+            dirs.extend(self.download_dirs())
+        dirs.extend(self.policy_dirs())
+        return dedupe_roots(dirs)
+
+    def duplicate_roots(self):
+        """Roots searched for duplicate files"""
+        dirs = self.custom_dirs()
+        if self.locations.get('download_cleanup', False):
+            dirs.extend(self.download_dirs())
+        return dedupe_roots(dirs)
+
@@ -0,0 +1,163 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import datetime
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+AUDIT_LOGGER = 'cleanup.audit'
+
+_installed = {'handlers': [], 'listeners': []}
+
+
+class _AuditQueueHandler(QueueHandler):
+    """Queue the raw event dict; JSON encoding happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        event = dict(record.msg) if isinstance(record.msg, dict) else {'message': record.getMessage()}
+        event.setdefault('ts', datetime.datetime.fromtimestamp(record.created).isoformat(timespec='seconds'))
+        return json.dumps(event, separators=(',', ':'))
+
+
+def stop_logging():
+    """Flush and stop background listeners, remove handlers we installed"""
+    for listener in _installed['listeners']:
+        listener.stop()
+    for logger_name, handler in _installed['handlers']:
+        logging.getLogger(logger_name).removeHandler(handler)
+        handler.close()
+    _installed['listeners'] = []
+    _installed['handlers'] = []
+
+
+def _install(logger_name, handler):
+    logging.getLogger(logger_name).addHandler(handler)
+    _installed['handlers'].append((logger_name, handler))
+
+
+def setup_logging(config=None, log_file='logs/cleanup.log'):
+    """Configure root logging (and the optional audit stream) from ``config['logging']``
+
+    With ``async`` enabled the calling threads only enqueue records; a
+    QueueListener thread formats and writes them to the rotating log file
+    and the console. Calling it again replaces the previous setup.
+    """
+    settings = (config or {}).get('logging', {})
+    stop_logging()
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+    if settings.get('max_bytes'):
+        file_handler = RotatingFileHandler(log_file, maxBytes=settings['max_bytes'],
+                                           backupCount=settings.get('backup_count', 5))
+    else:
+        file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(formatter)
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO)
+
+    root = logging.getLogger('')
+    root.setLevel(getattr(logging, settings.get('level', 'INFO')))
+    if settings.get('async', False):
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, console, respect_handler_level=True)
+        listener.start()
+        _installed['listeners'].append(listener)
+        _install('', QueueHandler(log_queue))
+    else:
+        _install('', file_handler)
+        _install('', console)
+
+    audit_file = settings.get('audit_file')
+    audit = logging.getLogger(AUDIT_LOGGER)
+    audit.propagate = False
+    audit.setLevel(logging.INFO)
+    if audit_file:
+        os.makedirs(os.path.dirname(audit_file) or '.', exist_ok=True)
+        audit_handler = RotatingFileHandler(audit_file, maxBytes=settings.get('max_bytes', 0),
+                                            backupCount=settings.get('backup_count', 5))
+        audit_handler.setFormatter(JsonLineFormatter())
+        audit_queue = queue.SimpleQueue()
+        listener = QueueListener(audit_queue, audit_handler)
+        listener.start()
+        _installed['listeners'].append(listener)
+        _install(AUDIT_LOGGER, _AuditQueueHandler(audit_queue))
+
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
+
+
+class FileEventLog:
+    """Per-file log messages with sampling and an optional JSONL audit trail.
+
+    ``per_file`` is ``all`` (one line per file), ``sample`` (every
+    ``sample_every``-th file per action) or ``summary`` (counts only).
+    Errors are always logged. Audit events are written for every file when
+    ``logging.audit_file`` is configured, independent of sampling.
+    """
+
+    MESSAGES = {
+        'deleted': "Cleaned",
+        'would_delete': "Would delete",
+    }
+
+    def __init__(self, config=None):
+        settings = (config or {}).get('logging', {})
+        self.mode = settings.get('per_file', 'all')
+        self.sample_every = max(1, settings.get('sample_every', 1000))
+        self.audit = logging.getLogger(AUDIT_LOGGER)
+        self._counts = {}
+        self._bytes = {}
+        self._lock = threading.Lock()
+
+    def event(self, action, record, error=None):
+        with self._lock:
+            count = self._counts.get(action, 0) + 1
+            self._counts[action] = count
+            self._bytes[action] = self._bytes.get(action, 0) + record.size
+
+        if self.audit.handlers:
+            event = {'action': action, 'path': record.path, 'size': record.size,
+                     'mtime': record.mtime, 'reason': record.reason}
+            if error is not None:
+                event['error'] = str(error)
+            self.audit.info(event)
+
+        if error is not None:
+            logging.error(f"Error deleting {record.path}: {error}")
+            return
+        if self.mode == 'summary':
+            return
+        if self.mode == 'sample' and (count - 1) % self.sample_every:
+            return
+        suffix = f" [{record.reason}]" if record.reason and action == 'would_delete' else ""
+        logging.info(f"{self.MESSAGES.get(action, action)}: {record.path} "
+                     f"({record.size_mb:.2f} MB){suffix}")
+
+    def log_summary(self):
+        """Log per-action totals when per-file lines were sampled or suppressed"""
+        if self.mode == 'all':
+            return
+        for action, count in sorted(self._counts.items()):
+            size_mb = self._bytes[action] / (1024 * 1024)
+            note = f", 1 in {self.sample_every} logged" if self.mode == 'sample' else ""
+            logging.info(f"{action}: {count} files ({size_mb:.2f} MB){note}")
+
+    def totals(self):
+        """Return {action: (files, bytes)} for the current run"""
+        with self._lock:
+            return {action: (count, self._bytes[action]) for action, count in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._bytes.clear()
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import bisect
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+
+# Latency buckets in seconds, 1 µs .. 10 s
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (non-cumulative counts, +Inf last)"""
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q-quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum_seconds': round(self.sum, 6),
+            'avg_us': round(self.sum / self.count * 1e6, 2) if self.count else 0.0,
+            'p50_us': round(self.quantile(0.5) * 1e6, 2),
+            'p99_us': round(self.quantile(0.99) * 1e6, 2),
+            'max_us': round(self.max * 1e6, 2),
+        }
+
+
+class Metrics:
+    """Per-stage counters and latency histograms for one cleanup run.
+
+    Stages are timed by wrapping the methods of existing objects
+    (``instrument``), so nothing is measured, and nothing costs anything,
+    unless ``metrics.enabled`` is set.
+    """
+
+    def __init__(self, config=None):
+        settings = (config or {}).get('metrics', {})
+        self.enabled = settings.get('enabled', False)
+        self.json_path = settings.get('json_path', 'logs/metrics.json')
+        self.prometheus_path = settings.get('prometheus_path')
+        self.profile = settings.get('profile')
+        self.profile_dir = settings.get('profile_dir', 'logs')
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._run_started = None
+
+    # -- recording -------------------------------------------------------
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def instrument(self, obj, method_name, stage):
+        """Replace obj.method_name with a timed wrapper (no-op when disabled)"""
+        if not self.enabled or obj is None or not hasattr(obj, method_name):
+            return
+        method = getattr(obj, method_name)
+        observe = self.observe
+        perf_counter = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                observe(stage, perf_counter() - started)
+
+        setattr(obj, method_name, timed)
+
+    # -- run lifecycle ---------------------------------------------------
+
+    def start_run(self):
+        if not self.enabled:
+            return
+        self._run_started = time.time()
+        if self.profile == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.start(10)
+
+    def finish_run(self):
+        """Stop profilers and export the run summary"""
+        if not self.enabled:
+            return None
+        finished = time.time()
+        if self._run_started is not None:
+            self.set_gauge('run_duration_seconds', finished - self._run_started)
+        self.set_gauge('last_run_timestamp_seconds', finished)
+        self._stop_profiler()
+        summary = self.as_dict()
+        if self.json_path:
+            _atomic_write(self.json_path, json.dumps(summary, indent=4))
+        if self.prometheus_path:
+            _atomic_write(self.prometheus_path, self.to_prometheus())
+        return summary
+
+    def _stop_profiler(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if self.profile == 'cprofile' and self._profiler is not None:
+            self._profiler.disable()
+            path = os.path.join(self.profile_dir, 'cleanup.prof')
+            self._profiler.dump_stats(path)
+            logging.info(f"cProfile stats written to {path}")
+            self._profiler = None
+        elif self.profile == 'tracemalloc':
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.set_gauge('traced_memory_peak_bytes', peak)
+                top = [{'location': str(stat.traceback[0]), 'size_bytes': stat.size, 'count': stat.count}
+                       for stat in snapshot.statistics('lineno')[:25]]
+                path = os.path.join(self.profile_dir, 'cleanup_tracemalloc.json')
+                _atomic_write(path, json.dumps({'peak_bytes': peak, 'top': top}, indent=4))
+                logging.info(f"tracemalloc top allocations written to {path}")
+
+    # -- export ----------------------------------------------------------
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'stages': {stage: h.as_dict() for stage, h in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'gauges': dict(sorted(self.gauges.items())),
+            }
+
+    def to_prometheus(self):
+        """Render node_exporter textfile-collector format"""
+        lines = [
+            "# HELP cleanup_stage_seconds Latency of cleanup pipeline stages.",
+            "# TYPE cleanup_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'cleanup_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'cleanup_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'cleanup_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE cleanup_{name}_total counter")
+                lines.append(f"cleanup_{name}_total {value}")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE cleanup_{name} gauge")
+                lines.append(f"cleanup_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self):
+        if not self.enabled:
+            return
+        for stage, histogram in sorted(self.histograms.items()):
+            data = histogram.as_dict()
+            logging.info(f"Stage {stage}: {data['count']} calls, {data['sum_seconds']:.3f}s total, "
+                         f"avg {data['avg_us']:.1f} µs, p99 <= {data['p99_us']:.1f} µs")
+
+
+def _atomic_write(path, text):
+    """Write via rename so scrapers never read a half written file"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,169 @@
+import os
+import queue
+import logging
+import threading
+from collections import deque
+from src.utils.scanner import Scanner, ScanStats
+from src.utils.system_info import group_by_device
+
+
+class ParallelScanner:
+    """Multi-root, multi-threaded directory walker.
+
+    Every worker owns a deque of directories. It pops its own newest
+    directory (depth first, cache friendly) and, when it runs dry, steals
+    the oldest directory of another worker, which tends to be the root of
+    a large untouched subtree. Scanned files are handed to the consumer in
+    batches through a bounded queue so memory stays flat.
+
+    With ``device_lanes`` roots are grouped by st_dev and the workers are
+    split into one lane per device; stealing stays inside a lane, so each
+    disk is read by its own workers instead of all workers seeking across
+    all disks.
+    """
+
+    def __init__(self, workers=4, batch_size=256, queue_size=64, rules=None, device_lanes=True):
+        self.rules = rules
+        self.device_lanes = device_lanes
+        self.metrics = None
+        self.throttle = None
+        self.workers = max(1, int(workers))
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.stats = ScanStats()
+        self._stats_lock = threading.Lock()
+
+    def walk(self, root):
+        """Yield a FileRecord for every regular file below root"""
+        return self.walk_all([root])
+
+    def walk_all(self, roots):
+        """Yield a FileRecord for every regular file below any of the roots"""
+        for batch in self.walk_batches(roots):
+            yield from batch
+
+    def _lanes(self, roots):
+        """Return [(worker indices, roots)], one entry per I/O lane"""
+        everyone = list(range(self.workers))
+        if not self.device_lanes or len(roots) < 2:
+            return [(everyone, roots)]
+        states = dict(roots)
+        groups = list(group_by_device([root for root, _ in roots]).values())
+        if len(groups) < 2:
+            return [(everyone, roots)]
+        count = min(len(groups), self.workers)
+        lanes = [([], []) for _ in range(count)]
+        for i, group in enumerate(groups):
+            lanes[i % count][1].extend((root, states[root]) for root in group)
+        # Roots that could not be stat()-ed still go through scan_dir for its error log
+        grouped = {root for group in groups for root in group}
+        lanes[0][1].extend((root, state) for root, state in roots if root not in grouped)
+        for index in everyone:
+            lanes[index % count][0].append(index)
+        return lanes
+
+    def walk_batches(self, roots):
+        """Yield lists of FileRecords while worker threads traverse the roots"""
+        root_scanner = Scanner(self.rules)
+        roots = [(root, root_scanner.root_state(root))
+                 for root in map(os.fspath, roots)]
+        self.stats.merge(root_scanner.stats)
+        roots = [(root, state) for root, state in roots if state is not None]
+        if not roots:
+            return
+
+        deques = [deque() for _ in range(self.workers)]
+        lanes = self._lanes(roots)
+        victims = [None] * self.workers
+        for members, lane_roots in lanes:
+            for i, root in enumerate(lane_roots):
+                deques[members[i % len(members)]].append(root)
+            for position, index in enumerate(members):
+                victims[index] = members[position + 1:] + members[:position]
+
+        state = {'pending': sum(len(lane_roots) for _, lane_roots in lanes)}
+        cond = threading.Condition()
+        stop = threading.Event()
+        out = queue.Queue(maxsize=self.queue_size)
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def next_directory(index):
+            own = deques[index]
+            while not stop.is_set():
+                try:
+                    return own.pop()
+                except IndexError:
+                    pass
+                for victim in victims[index]:
+                    try:
+                        return deques[victim].popleft()
+                    except IndexError:
+                        continue
+                with cond:
+                    if state['pending'] == 0:
+                        return None
+                    cond.wait(0.05)
+            return None
+
+        def worker(index):
+            scanner = Scanner(self.rules)
+            scanner.throttle = self.throttle
+            if self.metrics is not None:
+                self.metrics.instrument(scanner, 'scan_dir', 'walk_dir')
+            batch = []
+            try:
+                while True:
+                    directory = next_directory(index)
+                    if directory is None:
+                        break
+                    files, subdirs = scanner.scan_dir(*directory)
+                    with cond:
+                        # Count children before publishing them so the
+                        # pending counter can never touch zero early
+                        state['pending'] += len(subdirs)
+                        deques[index].extend(subdirs)
+                        state['pending'] -= 1
+                        cond.notify_all()
+                    scanner.stats.files_yielded += len(files)
+                    batch.extend(files)
+                    if len(batch) >= self.batch_size:
+                        if not put(batch):
+                            break
+                        batch = []
+                if batch:
+                    put(batch)
+            except Exception as e:
+                logging.error(f"Scan worker {index} failed: {e}")
+                stop.set()
+            finally:
+                with self._stats_lock:
+                    self.stats.merge(scanner.stats)
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True,
+                                    name=f"scan-worker-{i}")
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                try:
+                    yield out.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(thread.is_alive() for thread in threads):
+                        break
+            # Workers are gone; hand over whatever they queued last
+            while not out.empty():
+                yield out.get_nowait()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
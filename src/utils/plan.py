@@ -0,0 +1,275 @@
+import os
+import sys
+import mmap
+import stat
+import time
+import struct
+import logging
+from array import array
+from src.utils.scanner import FileRecord
+from src.utils.subtree import TreeRecord
+
+MAGIC = b'CLNPLAN2'
+# magic, byte order, entries, directories, name bytes, dir bytes, tree directories,
+# created, rules fingerprint
+HEADER = struct.Struct('=8s8sQQQQQd40s')
+KIND_FILE = 0
+KIND_TREE = 1
+
+# (column, array typecode); all 8-byte columns first keeps every section aligned.
+# name_offsets and tree_dirs hold count + 1 offsets; tree_dirs points into the
+# (tree_dir_mtime, tree_dir_index) table of directories inside each tree entry.
+COLUMNS = (('ino', 'Q'), ('dev', 'Q'), ('size', 'Q'), ('mtime', 'd'),
+           ('name_offsets', 'Q'), ('tree_dirs', 'Q'), ('dir_index', 'I'), ('files', 'I'),
+           ('kind', 'B'))
+OFFSET_COLUMNS = ('name_offsets', 'tree_dirs')
+
+
+class PlanWriter:
+    """Append-only writer for a columnar deletion plan.
+
+    Each entry costs a few fixed-width array slots plus its file name
+    bytes; directory paths are stored once in a separate table. Nothing is
+    kept as a per-entry Python object, so plans with millions of entries
+    stay small in memory and on disk.
+    """
+
+    def __init__(self, path, fingerprint=''):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        for name in OFFSET_COLUMNS:
+            self.columns[name].append(0)
+        self.tree_dir_mtime = array('d')
+        self.tree_dir_index = array('I')
+        self.names = bytearray()
+        self.dirs = {}
+        self.dir_blob = bytearray()
+        self.dir_offsets = array('Q', [0])
+        self.count = 0
+        self.bytes = 0
+
+    def _dir_index(self, directory):
+        index = self.dirs.get(directory)
+        if index is None:
+            index = self.dirs[directory] = len(self.dirs)
+            self.dir_blob += os.fsencode(directory)
+            self.dir_offsets.append(len(self.dir_blob))
+        return index
+
+    def add(self, record):
+        directory, name = os.path.split(record.path)
+        index = self._dir_index(directory)
+        self.names += os.fsencode(name)
+        columns = self.columns
+        tree = isinstance(record, TreeRecord)
+        columns['ino'].append(record.ino)
+        columns['dev'].append(record.dev)
+        columns['size'].append(record.size)
+        # A tree is revalidated by its directory mtime, a file by its own
+        columns['mtime'].append(record.dir_mtime if tree else record.mtime)
+        columns['name_offsets'].append(len(self.names))
+        if tree:
+            for path, mtime in record.dirs:
+                self.tree_dir_index.append(self._dir_index(path))
+                self.tree_dir_mtime.append(mtime)
+        columns['tree_dirs'].append(len(self.tree_dir_index))
+        columns['dir_index'].append(index)
+        columns['files'].append(record.files if tree else 1)
+        columns['kind'].append(KIND_TREE if tree else KIND_FILE)
+        self.count += 1
+        self.bytes += record.size
+
+    def close(self):
+        """Write the plan atomically and return the number of entries"""
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, sys.byteorder.encode().ljust(8, b'\0'), self.count,
+                                len(self.dirs), len(self.names), len(self.dir_blob),
+                                len(self.tree_dir_index), time.time(),
+                                self.fingerprint.encode()[:40]))
+            for name, _ in COLUMNS:
+                self.columns[name].tofile(f)
+                _pad(f)
+            self.dir_offsets.tofile(f)
+            self.tree_dir_mtime.tofile(f)
+            self.tree_dir_index.tofile(f)
+            _pad(f)
+            f.write(self.names)
+            f.write(self.dir_blob)
+        os.replace(tmp, self.path)
+        return self.count
+
+
+def _pad(f):
+    """Align the next section to 8 bytes"""
+    f.write(b'\0' * (-f.tell() % 8))
+
+
+class Plan:
+    """Read-only, memory-mapped view of a plan file.
+
+    Columns are memoryview casts into the mapping, so opening a plan
+    reads nothing but the header and entries are decoded one at a time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"Empty plan file: {path}")
+        (magic, byteorder, self.count, dir_count, names_len, dirs_len, tree_dir_count,
+         self.created, fingerprint) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a cleanup plan: {path}")
+        if byteorder.rstrip(b'\0').decode() != sys.byteorder:
+            raise ValueError(f"Plan {path} was written on a {byteorder.decode()}-endian host")
+        self.fingerprint = fingerprint.rstrip(b'\0').decode()
+
+        view = memoryview(self._map)
+        offset = HEADER.size
+        self.columns = {}
+        for name, code in COLUMNS:
+            length = self.count + 1 if name in OFFSET_COLUMNS else self.count
+            size = length * array(code).itemsize
+            self.columns[name] = view[offset:offset + size].cast(code)
+            offset += size + (-size % 8)
+        size = (dir_count + 1) * 8
+        self.dir_offsets = view[offset:offset + size].cast('Q')
+        offset += size
+        size = tree_dir_count * 8
+        self.tree_dir_mtime = view[offset:offset + size].cast('d')
+        offset += size
+        size = tree_dir_count * 4
+        self.tree_dir_index = view[offset:offset + size].cast('I')
+        offset += size + (-size % 8)
+        self.names = view[offset:offset + names_len]
+        offset += names_len
+        self.dir_blob = view[offset:offset + dirs_len]
+        view.release()
+
+    def directory(self, index):
+        start, end = self.dir_offsets[index], self.dir_offsets[index + 1]
+        return os.fsdecode(bytes(self.dir_blob[start:end]))
+
+    def tree_dirs(self, i):
+        """(path, mtime) of the directories inside tree entry i"""
+        offsets = self.columns['tree_dirs']
+        return tuple((self.directory(self.tree_dir_index[j]), self.tree_dir_mtime[j])
+                     for j in range(offsets[i], offsets[i + 1]))
+
+    def name(self, i):
+        offsets = self.columns['name_offsets']
+        return os.fsdecode(bytes(self.names[offsets[i]:offsets[i + 1]]))
+
+    @property
+    def total_bytes(self):
+        return sum(self.columns['size'])
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        for view in (self.dir_offsets, self.tree_dir_mtime, self.tree_dir_index,
+                     self.names, self.dir_blob):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PlanValidator:
+    """Turn plan entries back into records, checking each with one fstatat().
+
+    Entries are visited in plan order, which groups them by directory; each
+    directory is opened once and its entries are stat()-ed relative to that
+    descriptor. An entry is only yielded if inode, device, size, mtime and
+    file type still match what was planned; a tree entry additionally
+    needs the mtime of every directory inside it unchanged, so a tree
+    that gained or lost files anywhere below its top is skipped.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.skipped = 0
+        self.use_dir_fd = os.stat in os.supports_dir_fd and hasattr(os, 'O_DIRECTORY')
+
+    def _check(self, i, st):
+        columns = self.plan.columns
+        kind = columns['kind'][i]
+        if kind == KIND_TREE:
+            if not stat.S_ISDIR(st.st_mode):
+                return False
+        elif not stat.S_ISREG(st.st_mode) or st.st_size != columns['size'][i]:
+            return False
+        return (st.st_ino == columns['ino'][i] and st.st_dev == columns['dev'][i] and
+                st.st_mtime == columns['mtime'][i])
+
+    def _record(self, i, directory, name):
+        columns = self.plan.columns
+        path = os.path.join(directory, name)
+        if columns['kind'][i] == KIND_TREE:
+            files = columns['files'][i]
+            return TreeRecord(path, columns['size'][i], columns['mtime'][i], columns['mtime'][i],
+                              files, columns['ino'][i], columns['dev'][i],
+                              reason=f"planned subtree, {files} files",
+                              dirs=self.plan.tree_dirs(i))
+        return FileRecord(path, name, columns['size'][i], columns['mtime'][i],
+                          columns['ino'][i], columns['dev'][i], reason="planned")
+
+    def __iter__(self):
+        plan = self.plan
+        dir_index = plan.columns['dir_index']
+        current = None
+        fd = None
+        directory = None
+        try:
+            for i in range(plan.count):
+                if dir_index[i] != current:
+                    current = dir_index[i]
+                    directory = plan.directory(current)
+                    if fd is not None:
+                        os.close(fd)
+                        fd = None
+                    if self.use_dir_fd:
+                        try:
+                            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                        except OSError:
+                            fd = -1
+                name = plan.name(i)
+                try:
+                    if fd == -1:
+                        raise FileNotFoundError(directory)
+                    if fd is not None:
+                        st = os.stat(name, dir_fd=fd, follow_symlinks=False)
+                    else:
+                        st = os.stat(os.path.join(directory, name), follow_symlinks=False)
+                except OSError:
+                    self.skipped += 1
+                    continue
+                if not self._check(i, st):
+                    self.skipped += 1
+                    continue
+                record = self._record(i, directory, name)
+                # A tree also needs every directory inside it unchanged
+                if isinstance(record, TreeRecord) and record.changed() is not None:
+                    self.skipped += 1
+                    continue
+                yield record
+        finally:
+            if fd is not None and fd != -1:
+                os.close(fd)
+
+
+def describe(plan):
+    created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(plan.created))
+    logging.info(f"Plan {plan.path}: {plan.count} entries, "
+                 f"{plan.total_bytes / (1024 * 1024):.2f} MB, created {created}")
@@ -0,0 +1,312 @@
+import os
+import re
+import math
+import fnmatch
+
+GLOB_CHARS = frozenset('*?[')
+SECONDS_PER_DAY = 24 * 60 * 60
+# ``cleanup`` keys a per-location policy may override
+POLICY_KEYS = ('target_extensions', 'min_file_age_days', 'min_size_mb')
+
+
+def split_path(path):
+    """Split a path into lower-cased components, accepting / and \\"""
+    return [part for part in str(path).replace('\\', '/').lower().split('/') if part]
+
+
+def _is_anchored(pattern):
+    """Absolute patterns ("/var/cache", "C:/Windows") only match at the root"""
+    pattern = pattern.replace('\\', '/')
+    return pattern.startswith('/') or re.match(r'^[a-zA-Z]:(/|$)', pattern) is not None
+
+
+def compile_globs(patterns):
+    """Combine shell globs into one case-insensitive regex (or None)"""
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{fnmatch.translate(p.lower())})' for p in patterns))
+
+
+class _TrieNode:
+    __slots__ = ('children', 'terminal')
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = False
+
+
+class PathTrie:
+    """Trie of directory component sequences.
+
+    Relative patterns ("Windows/System32") match a contiguous run of
+    components anywhere in a path, absolute ones only from the root. The
+    matcher is incremental: a walk carries a small state per directory and
+    advances it one component at a time, so checking a directory costs
+    O(pattern length) instead of re-scanning the whole path.
+    """
+
+    def __init__(self, patterns=()):
+        self.floating = _TrieNode()
+        self.anchored = _TrieNode()
+        self.empty = True
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern):
+        parts = split_path(pattern)
+        if not parts:
+            return
+        node = self.anchored if _is_anchored(pattern) else self.floating
+        for part in parts:
+            node = node.children.setdefault(part, _TrieNode())
+        node.terminal = True
+        self.empty = False
+
+    def initial_state(self):
+        return (self.anchored, ())
+
+    def advance(self, state, component):
+        """Advance state by one lower-cased component; return (state, matched)"""
+        anchored, active = state
+        matched = False
+        if anchored is not None:
+            anchored = anchored.children.get(component)
+            if anchored is not None and anchored.terminal:
+                matched = True
+        nodes = []
+        for node in active + (self.floating,):
+            child = node.children.get(component)
+            if child is not None:
+                if child.terminal:
+                    matched = True
+                if child.children:
+                    nodes.append(child)
+        return (anchored, tuple(nodes)), matched
+
+    def state_for(self, path):
+        """Return (state, matched) after consuming every component of path"""
+        state = self.initial_state()
+        matched = False
+        for component in split_path(path):
+            state, hit = self.advance(state, component)
+            matched = matched or hit
+        return state, matched
+
+    def matches(self, path):
+        """Check whether any pattern matches a directory run of path"""
+        if self.empty:
+            return False
+        return self.state_for(path)[1]
+
+
+class CompiledRules:
+    """Precompiled form of the ``safety`` and ``cleanup`` config sections.
+
+    Built once when the configuration is loaded; the per-file checks are
+    then set lookups and a single regex match instead of linear scans over
+    the config lists.
+    """
+
+    def __init__(self, protected_directories=(), protected_extensions=(),
+                 target_extensions=(), min_file_age_days=0, min_size_mb=0,
+                 exclude_directories=()):
+        self.protected_dirs = PathTrie(protected_directories)
+        self.excluded_dirs = compile_globs(exclude_directories)
+        self.protected_exts = frozenset(ext.lower() for ext in protected_extensions)
+
+        suffixes = []
+        globs = []
+        for ext in target_extensions:
+            ext = ext.lower()
+            if GLOB_CHARS.intersection(ext):
+                globs.append(ext)
+            elif ext.startswith('.'):
+                suffixes.append(ext)
+            else:
+                # Plain text without a dot keeps the old endswith() meaning
+                globs.append('*' + ext)
+        self.target_suffixes = frozenset(suffixes)
+        self.target_globs = compile_globs(globs)
+
+        self.min_age_seconds = math.ceil(min_file_age_days) * SECONDS_PER_DAY
+        self.min_size_bytes = min_size_mb * 1024 * 1024
+
+    @staticmethod
+    def settings_from(config, overrides=None):
+        """Constructor arguments for the config, with ``cleanup`` keys overridden"""
+        safety = config['safety']
+        cleanup = dict(config['cleanup'], **(overrides or {}))
+        return dict(protected_directories=safety['protected_directories'],
+                    protected_extensions=safety['protected_extensions'],
+                    target_extensions=cleanup['target_extensions'],
+                    min_file_age_days=cleanup['min_file_age_days'],
+                    min_size_mb=cleanup['min_size_mb'],
+                    exclude_directories=config.get('scan', {}).get('exclude_directories', []))
+
+    @classmethod
+    def from_config(cls, config):
+        """Compile the config; with ``policies`` the result is a PolicyRules"""
+        if config.get('policies'):
+            return PolicyRules(config)
+        return cls(**cls.settings_from(config))
+
+    # -- directory level -------------------------------------------------
+
+    def enter_root(self, path):
+        """Matcher state for a scan root, or None if the root is protected"""
+        state, matched = self.protected_dirs.state_for(path)
+        return None if matched else state
+
+    def enter_dir(self, state, name):
+        """Matcher state for a sub-directory, or None to prune the subtree"""
+        state, matched = self.protected_dirs.advance(state, name.lower())
+        return None if matched else state
+
+    def is_excluded_dir(self, name):
+        """Check a directory name against ``scan.exclude_directories`` globs"""
+        return self.excluded_dirs is not None and self.excluded_dirs.match(name.lower()) is not None
+
+    def is_protected_dir(self, path):
+        """Check whether a path lies inside a protected directory"""
+        return self.protected_dirs.matches(path)
+
+    # -- file level ------------------------------------------------------
+
+    def is_protected_ext(self, name):
+        """Check the last suffix of a file name against protected extensions"""
+        dot = name.rfind('.')
+        return dot > 0 and name[dot:].lower() in self.protected_exts
+
+    def matches_target(self, name):
+        """Check a file name against the target extensions and globs"""
+        return self.target_match(name) is not None
+
+    def target_match(self, name):
+        """Return the target suffix (or 'glob') a file name matches, else None"""
+        name = name.lower()
+        dot = name.find('.')
+        while dot != -1:
+            if name[dot:] in self.target_suffixes:
+                return name[dot:]
+            dot = name.find('.', dot + 1)
+        if self.target_globs is not None and self.target_globs.match(name) is not None:
+            return 'glob'
+        return None
+
+    def matches(self, name, size, mtime, now):
+        """Apply age, size and extension rules to already known stat values"""
+        return (now - mtime >= self.min_age_seconds and
+                size >= self.min_size_bytes and
+                self.target_match(name) is not None)
+
+    def match_reason(self, name, size, mtime, now):
+        """Like matches() but return a short reason string (or None)"""
+        if now - mtime < self.min_age_seconds or size < self.min_size_bytes:
+            return None
+        target = self.target_match(name)
+        if target is None:
+            return None
+        return f"{target}, {int((now - mtime) // SECONDS_PER_DAY)} days old"
+
+    # -- location level --------------------------------------------------
+
+    def rules_for(self, directory):
+        """(policy name, rules) pairs that apply to files in a directory"""
+        return ((None, self),)
+
+    def min_age_for(self, directory):
+        """Smallest minimum age of the rules that apply in a directory"""
+        return min(rules.min_age_seconds for _, rules in self.rules_for(directory))
+
+    def could_match(self, directory, name, size):
+        """Whether a file in directory can become a candidate just by ageing"""
+        return any(size >= rules.min_size_bytes and rules.target_match(name) is not None
+                   for _, rules in self.rules_for(directory))
+
+    def path_reason(self, directory, name, size, mtime, now):
+        """match_reason() under the rules of the file's directory"""
+        for policy, rules in self.rules_for(directory):
+            reason = rules.match_reason(name, size, mtime, now)
+            if reason is not None:
+                return reason if policy is None else f"{policy}: {reason}"
+        return None
+
+
+class PolicyRules(CompiledRules):
+    """``cleanup`` rules plus per-location ``policies``.
+
+    Each policy lists ``roots`` and may override ``target_extensions``,
+    ``min_file_age_days`` and ``min_size_mb``; other keys come from
+    ``cleanup``. Below a policy root the policies of that root and of all
+    enclosing policy roots replace the global rules, and a file is a
+    candidate if any of them matches (the innermost policy is tried
+    first). Roots are compiled into a dict keyed by resolved path prefix;
+    a directory is looked up once by walking its ancestors through that
+    dict and the result is cached, so every file is still visited by a
+    single scan however many policies there are.
+
+    The inherited name-only checks use the loosest bounds of all rule
+    sets, so a filter that does not know the path never rejects a file
+    some policy would take.
+
+    Resolved prefixes depend on $HOME and on symlinks, so they are left
+    out of a pickle and resolved again when it is loaded.
+    """
+
+    def __init__(self, config):
+        settings = self.settings_from(config)
+        self.default = CompiledRules(**settings)
+        self.roots = []
+        self.names = []
+        all_settings = [settings]
+        for index, policy in enumerate(config['policies']):
+            name = policy.get('name') or f"policy {index + 1}"
+            overrides = {key: policy[key] for key in POLICY_KEYS if key in policy}
+            policy_settings = self.settings_from(config, overrides)
+            rules = CompiledRules(**policy_settings)
+            all_settings.append(policy_settings)
+            self.names.append(name)
+            for root in policy.get('roots', []):
+                self.roots.append((root, name, rules))
+
+        loose = dict(settings)
+        loose['target_extensions'] = sorted({ext for s in all_settings for ext in s['target_extensions']})
+        loose['min_file_age_days'] = min(s['min_file_age_days'] for s in all_settings)
+        loose['min_size_mb'] = min(s['min_size_mb'] for s in all_settings)
+        super().__init__(**loose)
+        self.default_rules = ((None, self.default),)
+        self._resolve()
+
+    def _resolve(self):
+        from src.utils.locations import resolve_root
+        self.prefixes = {}
+        for root, name, rules in self.roots:
+            key = os.path.normcase(resolve_root(root))
+            self.prefixes.setdefault(key, []).append((name, rules))
+        self._cache = {}
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['prefixes'], state['_cache']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._resolve()
+
+    def rules_for(self, directory):
+        found = self._cache.get(directory)
+        if found is None:
+            found = []
+            key = os.path.normcase(directory)
+            while True:
+                found.extend(self.prefixes.get(key, ()))
+                parent = os.path.dirname(key)
+                if parent == key:
+                    break
+                key = parent
+            found = tuple(found) or self.default_rules
+            if len(self._cache) >= 65536:
+                self._cache.clear()
+            self._cache[directory] = found
+        return found
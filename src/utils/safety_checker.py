@@ -1,37 +1,46 @@
 import os
 from pathlib import Path
 import logging
+from src.utils.rules import CompiledRules
+from src.utils.in_use import InUseDetector
 
 class SafetyChecker:
-    def __init__(self, config):
-        self.protected_dirs = config['safety']['protected_directories']
-        self.protected_exts = config['safety']['protected_extensions']
+    def __init__(self, config, rules=None):
+        self.rules = rules if rules is not None else CompiledRules.from_config(config)
+        self.in_use = InUseDetector.from_config(config)
         
-    def is_safe_to_delete(self, file_path):
-        """Check if file is safe to delete"""
+    def instrument(self, metrics):
+        """Time safety checks and in-use lookups"""
+        metrics.instrument(self, 'is_safe_to_delete', 'safety_check')
+        metrics.instrument(self, 'is_safe_record', 'safety_check')
+        metrics.instrument(self.in_use, 'is_in_use', 'in_use')
+        
+    def is_safe_to_delete(self, file_path, scanned=False):
+        """Check if file is safe to delete
+
+        ``scanned`` marks paths that were just returned by the scanner. The
+        scanner already pruned protected directories and stat()-ed the
+        file, so the existence and directory checks are skipped.
+        """
         try:
             path = Path(file_path)
             
             # Check if file exists
-            if not path.exists():
+            if not scanned and not path.exists():
                 return False
                 
             # Check if in protected directory
-            if any(pdir.lower() in str(path).lower() 
-                  for pdir in self.protected_dirs):
+            if not scanned and self.rules.is_protected_dir(path.parent):
                 logging.warning(f"Protected directory: {file_path}")
                 return False
                 
             # Check if protected extension
-            if path.suffix.lower() in self.protected_exts:
+            if self.rules.is_protected_ext(path.name):
                 logging.warning(f"Protected file type: {file_path}")
                 return False
                 
             # Check if file is in use
-            try:
-                with open(file_path, 'rb') as _:
-                    pass
-            except PermissionError:
+            if self.in_use.is_in_use(file_path):
                 logging.warning(f"File in use: {file_path}")
                 return False
                 
@@ -39,4 +48,25 @@ class SafetyChecker:
             
         except Exception as e:
             logging.error(f"Safety check error for {file_path}: {e}")
+            return False
+
+    def is_safe_record(self, record):
+        """Check a FileRecord from the scanner (protected dirs already pruned)
+
+        Meant to run after the cheap size/age/extension filters: the in-use
+        lookup uses the record's dev/inode and never opens the file.
+        """
+        try:
+            if self.rules.is_protected_ext(record.name):
+                logging.warning(f"Protected file type: {record.path}")
+                return False
+                
+            if self.in_use.is_in_use(record.path, record.dev, record.ino):
+                logging.warning(f"File in use: {record.path}")
+                return False
+                
+            return True
+            
+        except Exception as e:
+            logging.error(f"Safety check error for {record.path}: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from src.utils.scanner import Scanner, FileRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER, ino INTEGER, dev INTEGER
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, dir TEXT, name TEXT, size INTEGER, mtime REAL,
+    ino INTEGER, dev INTEGER, verdict INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir, verdict);
+"""
+
+# Per-file verdicts. Age is not part of the verdict: it is re-checked from
+# the stored mtime on every run, so ageing files are found without a walk.
+VERDICT_REJECTED = 0
+VERDICT_ELIGIBLE = 1
+
+
+def rules_fingerprint(config):
+    """Hash of the config sections a stored verdict depends on"""
+    sections = {key: config.get(key) for key in ('safety', 'cleanup', 'policies')}
+    sections['exclude_directories'] = config.get('scan', {}).get('exclude_directories', [])
+    return hashlib.sha1(json.dumps(sections, sort_keys=True).encode()).hexdigest()
+
+
+class ScanIndex:
+    """SQLite store of directory mtimes and per-file size/mtime/verdict"""
+
+    def __init__(self, path, fingerprint):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if self.get_meta('fingerprint') != fingerprint:
+            # Rules changed, every stored verdict is stale
+            self.conn.execute("DELETE FROM dirs")
+            self.conn.execute("DELETE FROM files")
+            self.set_meta('fingerprint', fingerprint)
+            self.conn.commit()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                          (key, str(value)))
+
+    def get_dir(self, path):
+        """Return the stored (mtime_ns, ino) of a directory or None"""
+        return self.conn.execute("SELECT mtime_ns, ino FROM dirs WHERE path = ?",
+                                 (path,)).fetchone()
+
+    def subdirs(self, path):
+        return [row[0] for row in
+                self.conn.execute("SELECT path FROM dirs WHERE parent = ?", (path,))]
+
+    def eligible_files(self, path):
+        return self.conn.execute(
+            "SELECT path, name, size, mtime, ino, dev FROM files WHERE dir = ? AND verdict = ?",
+            (path, VERDICT_ELIGIBLE))
+
+    def update_file(self, record, verdict):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (record.path, os.path.dirname(record.path), record.name, record.size,
+             record.mtime, record.ino, record.dev, verdict))
+
+    def forget_file(self, path):
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def replace_dir(self, path, parent, stats, records, verdicts, subdirs):
+        """Store a freshly scanned directory, replacing what was known about it"""
+        self.conn.execute("DELETE FROM files WHERE dir = ?", (path,))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(r.path, path, r.name, r.size, r.mtime, r.ino, r.dev, v)
+             for r, v in zip(records, verdicts)])
+        known = set(self.subdirs(path))
+        for gone in known.difference(subdirs):
+            self.forget_tree(gone)
+        self.conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)",
+                          (path, parent, stats.st_mtime_ns, stats.st_ino, stats.st_dev))
+
+    def forget_tree(self, path):
+        """Drop a directory and everything recorded below it"""
+        prefix = path.rstrip(os.sep) + os.sep
+        self.conn.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                          (path, len(prefix), prefix))
+        self.conn.execute("DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?",
+                          (path, len(prefix), prefix))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class IndexedScanner:
+    """Incremental walker backed by a ScanIndex.
+
+    A directory whose mtime and inode match the index has had no entries
+    added, removed or renamed, so it is not listed again: its eligible files
+    come straight from the index and only those old enough to be deleted are
+    re-stat()-ed to confirm them. Changed and new directories are scanned
+    normally and written back. In-place growth of a previously rejected file
+    does not touch the directory mtime; it is picked up by the periodic full
+    rescan (``full_rescan_hours``).
+    """
+
+    def __init__(self, index_path, config, rules, full_rescan_hours=24):
+        self.index = ScanIndex(index_path, rules_fingerprint(config))
+        self.rules = rules
+        self.full_rescan_seconds = full_rescan_hours * 3600
+        self.scanner = Scanner(rules)
+        self.stats = self.scanner.stats
+
+    def _static_verdict(self, record):
+        if (self.rules.could_match(os.path.dirname(record.path), record.name, record.size) and
+                not self.rules.is_protected_ext(record.name)):
+            return VERDICT_ELIGIBLE
+        return VERDICT_REJECTED
+
+    def _indexed_files(self, directory, now):
+        """Confirm indexed candidates that have aged past the minimum age"""
+        records = []
+        min_age = self.rules.min_age_for(directory)
+        for path, name, size, mtime, ino, dev in self.index.eligible_files(directory).fetchall():
+            if now - mtime < min_age:
+                continue
+            try:
+                record = FileRecord.from_path(path)
+                self.stats.stat_calls += 1
+            except OSError:
+                self.index.forget_file(path)
+                continue
+            if record.mtime != mtime or record.size != size:
+                self.index.update_file(record, self._static_verdict(record))
+            records.append(record)
+        return records
+
+    def walk(self, root):
+        """Yield FileRecords below root, reusing the index for unchanged directories"""
+        root = os.fspath(root)
+        state = self.scanner.root_state(root)
+        if state is None:
+            return
+        now = time.time()
+        last_full = float(self.index.get_meta(f'full_scan:{root}') or 0)
+        full_scan = now - last_full >= self.full_rescan_seconds
+
+        stack = [(root, None, state)]
+        try:
+            while stack:
+                directory, parent, state = stack.pop()
+                try:
+                    stats = os.stat(directory, follow_symlinks=False)
+                    self.stats.stat_calls += 1
+                except OSError as e:
+                    self.stats.errors += 1
+                    self.index.forget_tree(directory)
+                    logging.error(f"Error reading {directory}: {e}")
+                    continue
+
+                known = self.index.get_dir(directory)
+                if (not full_scan and known is not None and
+                        known == (stats.st_mtime_ns, stats.st_ino)):
+                    self.stats.dirs_reused += 1
+                    files = self._indexed_files(directory, now)
+                    subdirs = []
+                    for path in self.index.subdirs(directory):
+                        if self.rules.is_excluded_dir(os.path.basename(path)):
+                            continue
+                        child_state = self.rules.enter_dir(state, os.path.basename(path))
+                        if child_state is not None:
+                            subdirs.append((path, child_state))
+                else:
+                    files, subdirs = self.scanner.scan_dir(directory, state)
+                    self.index.replace_dir(directory, parent, stats, files,
+                                           [self._static_verdict(r) for r in files],
+                                           [path for path, _ in subdirs])
+
+                self.stats.files_yielded += len(files)
+                yield from files
+                stack.extend((path, directory, child_state)
+                             for path, child_state in reversed(subdirs))
+
+            if full_scan:
+                self.index.set_meta(f'full_scan:{root}', now)
+        finally:
+            self.index.commit()
+
+    def close(self):
+        self.index.close()
@@ -0,0 +1,168 @@
+import os
+import time
+import logging
+
+
+class FileRecord:
+    """Lightweight record for a scanned file, built from a single stat"""
+    __slots__ = ('path', 'name', 'size', 'mtime', 'ino', 'dev', 'reason')
+
+    def __init__(self, path, name, size, mtime, ino=0, dev=0, reason=None):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        self.ino = ino
+        self.dev = dev
+        self.reason = reason
+
+    @classmethod
+    def from_entry(cls, entry, stats):
+        """Build a record from a DirEntry and its cached stat result"""
+        return cls(entry.path, entry.name, stats.st_size, stats.st_mtime,
+                   stats.st_ino, stats.st_dev)
+
+    @classmethod
+    def from_path(cls, path):
+        """Build a record by stat()-ing a path directly"""
+        stats = os.stat(path, follow_symlinks=False)
+        return cls(str(path), os.path.basename(path), stats.st_size,
+                   stats.st_mtime, stats.st_ino, stats.st_dev)
+
+    @property
+    def size_mb(self):
+        return self.size / (1024 * 1024)
+
+    def __repr__(self):
+        return f"FileRecord({self.path!r}, size={self.size}, mtime={self.mtime})"
+
+
+class ScanStats:
+    """Syscall counters collected while scanning"""
+    __slots__ = ('dirs_scanned', 'dirs_pruned', 'dirs_reused', 'entries_seen',
+                 'stat_calls', 'files_yielded', 'errors')
+
+    def __init__(self):
+        self.dirs_scanned = 0
+        self.dirs_pruned = 0
+        self.dirs_reused = 0
+        self.entries_seen = 0
+        self.stat_calls = 0
+        self.files_yielded = 0
+        self.errors = 0
+
+    @property
+    def syscalls(self):
+        """scandir() opens plus stat() calls"""
+        return self.dirs_scanned + self.stat_calls
+
+    @property
+    def syscalls_per_file(self):
+        if not self.files_yielded:
+            return 0.0
+        return self.syscalls / self.files_yielded
+
+    def merge(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['syscalls'] = self.syscalls
+        data['syscalls_per_file'] = round(self.syscalls_per_file, 3)
+        return data
+
+
+class Scanner:
+    """os.scandir based directory walker.
+
+    Every file is stat()-ed exactly once (DirEntry caches the result) and
+    yielded as a FileRecord, so later predicates never touch the disk again.
+    Symlinks are neither followed nor yielded. With compiled ``rules`` the
+    walk carries a protected-directory matcher state per directory and never
+    descends into protected or excluded subtrees.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = rules
+        self.stats = ScanStats()
+        self.throttle = None
+        self._last_dev = None
+
+    def charge(self, dev, ops, started):
+        """Charge one scanned directory to the I/O throttle of its device
+
+        Directories without files are charged to the previous device.
+        """
+        if dev is None:
+            dev = self._last_dev
+        self._last_dev = dev
+        self.throttle.observe(dev, (time.perf_counter() - started) / ops)
+        self.throttle.acquire(dev, ops)
+
+    def root_state(self, root):
+        """Matcher state for a scan root, or None if the root is protected"""
+        if self.rules is None:
+            return ()
+        state = self.rules.enter_root(root)
+        if state is None:
+            self.stats.dirs_pruned += 1
+            logging.warning(f"Protected directory: {root}")
+        return state
+
+    def child_state(self, entry, state):
+        """Matcher state for a sub-directory entry, or None if it is pruned"""
+        if self.rules.is_excluded_dir(entry.name):
+            self.stats.dirs_pruned += 1
+            return None
+        child_state = self.rules.enter_dir(state, entry.name)
+        if child_state is None:
+            self.stats.dirs_pruned += 1
+            logging.warning(f"Protected directory: {entry.path}")
+        return child_state
+
+    def scan_dir(self, directory, state=()):
+        """Scan one directory and return (file records, [(sub-directory, state)])"""
+        files = []
+        subdirs = []
+        rules = self.rules
+        started = time.perf_counter()
+        try:
+            with os.scandir(directory) as it:
+                self.stats.dirs_scanned += 1
+                for entry in it:
+                    self.stats.entries_seen += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            child_state = state
+                            if rules is not None:
+                                child_state = self.child_state(entry, state)
+                                if child_state is None:
+                                    continue
+                            subdirs.append((entry.path, child_state))
+                        elif entry.is_file(follow_symlinks=False):
+                            stats = entry.stat(follow_symlinks=False)
+                            self.stats.stat_calls += 1
+                            files.append(FileRecord.from_entry(entry, stats))
+                    except OSError as e:
+                        self.stats.errors += 1
+                        logging.error(f"Error reading {entry.path}: {e}")
+        except OSError as e:
+            self.stats.errors += 1
+            logging.error(f"Error scanning directory {directory}: {e}")
+        if self.throttle is not None:
+            self.charge(files[0].dev if files else None, 1 + len(files), started)
+        return files, subdirs
+
+    def walk(self, root):
+        """Yield a FileRecord for every regular file below root (depth first)"""
+        root = os.fspath(root)
+        state = self.root_state(root)
+        if state is None:
+            return
+        stack = [(root, state)]
+        while stack:
+            files, subdirs = self.scan_dir(*stack.pop())
+            self.stats.files_yielded += len(files)
+            yield from files
+            stack.extend(reversed(subdirs))
@@ -0,0 +1,67 @@
+import time
+import heapq
+import itertools
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class TopKSelector:
+    """Keep the K best deletion candidates of a stream in a bounded heap.
+
+    ``order`` is ``size`` (largest first, then oldest), ``age`` (oldest
+    first, then largest) or ``score`` (weighted sum of size in MB and age
+    in days). Memory stays O(K) however many candidates pass through;
+    ``dropped`` tells how many fell outside the top K on the last pass.
+    """
+
+    ORDERS = ('size', 'age', 'score')
+
+    def __init__(self, k=10000, order='size', size_weight=1.0, age_weight=1.0):
+        if order not in self.ORDERS:
+            raise ValueError(f"Unknown priority order: {order}")
+        self.k = max(1, int(k))
+        self.order = order
+        self.size_weight = size_weight
+        self.age_weight = age_weight
+        self.dropped = 0
+        self.seen = 0
+
+    @classmethod
+    def from_config(cls, config, default_order=None):
+        """Build a selector from ``cleanup.priority*`` (None if disabled)"""
+        cleanup = config['cleanup']
+        order = cleanup.get('priority', 'none')
+        if order in (None, 'none'):
+            if default_order is None:
+                return None
+            order = default_order
+        weights = cleanup.get('priority_weights', {})
+        return cls(k=cleanup.get('priority_top_k', 10000), order=order,
+                   size_weight=weights.get('size_mb', 1.0),
+                   age_weight=weights.get('age_days', 1.0))
+
+    def score(self, record, now):
+        """Sort key; larger means delete earlier"""
+        age = now - record.mtime
+        if self.order == 'size':
+            return (record.size, age)
+        if self.order == 'age':
+            return (age, record.size)
+        return (self.size_weight * record.size / (1024 * 1024) +
+                self.age_weight * age / SECONDS_PER_DAY,)
+
+    def select(self, candidates):
+        """Consume a candidate stream and return its top K, best first"""
+        now = time.time()
+        heap = []
+        counter = itertools.count()
+        self.seen = 0
+        for record in candidates:
+            self.seen += 1
+            item = (self.score(record, now), next(counter), record)
+            if len(heap) < self.k:
+                heapq.heappush(heap, item)
+            elif item[0] > heap[0][0]:
+                heapq.heapreplace(heap, item)
+        self.dropped = self.seen - len(heap)
+        return [record for _, _, record in sorted(heap, reverse=True)]
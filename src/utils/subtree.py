@@ -0,0 +1,183 @@
+import os
+import time
+import logging
+from src.utils.scanner import Scanner, FileRecord
+
+
+class TreeRecord(FileRecord):
+    """A whole directory that is deleted in one operation
+
+    ``dirs`` lists (path, mtime) of every directory below it as scanned.
+    Adding, removing or renaming an entry anywhere in the tree changes
+    one of these mtimes, which is how a tree that changed since the scan
+    is recognised before deletion.
+    """
+    __slots__ = ('files', 'dir_mtime', 'dirs')
+
+    def __init__(self, path, size, mtime, dir_mtime, files, ino=0, dev=0, reason=None, dirs=()):
+        super().__init__(path, os.path.basename(path), size, mtime, ino, dev, reason)
+        self.files = files
+        self.dir_mtime = dir_mtime
+        self.dirs = dirs
+
+    def changed(self):
+        """Return an error if any directory of the tree changed since the scan, else None"""
+        try:
+            if os.lstat(self.path).st_mtime != self.dir_mtime:
+                return RuntimeError("directory changed since it was scanned")
+            for path, mtime in self.dirs:
+                if os.lstat(path).st_mtime != mtime:
+                    return RuntimeError(f"sub-directory {path} changed since it was scanned")
+        except OSError as e:
+            return e
+        return None
+
+
+class _Frame:
+    __slots__ = ('path', 'state', 'stats', 'eligible', 'buffer', 'size', 'files',
+                 'newest', 'pending', 'parent', 'dirs')
+
+    def __init__(self, path, state, stats, parent):
+        self.path = path
+        self.state = state
+        self.stats = stats
+        self.parent = parent
+        self.eligible = True
+        self.buffer = []
+        self.size = 0
+        self.files = 0
+        self.newest = stats.st_mtime if stats is not None else 0
+        self.pending = None
+        self.dirs = []
+
+
+class SubtreeScanner(Scanner):
+    """Walker that collapses fully eligible directories into TreeRecords.
+
+    A directory is fully eligible when it is old enough itself and every
+    entry below it is a deletion candidate: no protected or excluded
+    sub-directory, no symlink or special file, no file that fails the
+    rules or is in use. Such a directory is yielded once as a TreeRecord
+    instead of file by file. Candidates of directories that turn out not
+    to qualify are yielded as ordinary FileRecords.
+
+    Only the direct files of the directories on the current path are
+    buffered (finished children collapse into one record), so memory is
+    bounded by depth x fan-out, not by subtree size. Scan roots themselves
+    are never collapsed.
+    """
+
+    def __init__(self, rules, is_candidate):
+        super().__init__(rules)
+        self.is_candidate = is_candidate
+        self.trees_found = 0
+
+    def _mark_ineligible(self, frame):
+        """Flush the buffers of frame and all eligible ancestors"""
+        flushed = []
+        while frame is not None and frame.eligible:
+            frame.eligible = False
+            flushed.extend(frame.buffer)
+            frame.buffer = []
+            frame = frame.parent
+        return flushed
+
+    def _enter(self, frame, now):
+        """List a directory; return records released by a lost eligibility"""
+        released = []
+        subdirs = []
+        files = 0
+        dev = None
+        started = time.perf_counter()
+        if (frame.stats is not None and
+                now - frame.stats.st_mtime < self.rules.min_age_for(frame.path)):
+            released.extend(self._mark_ineligible(frame))
+        try:
+            with os.scandir(frame.path) as it:
+                self.stats.dirs_scanned += 1
+                for entry in it:
+                    self.stats.entries_seen += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            child_state = None
+                            if not self.rules.is_excluded_dir(entry.name):
+                                child_state = self.rules.enter_dir(frame.state, entry.name)
+                            if child_state is None:
+                                self.stats.dirs_pruned += 1
+                                released.extend(self._mark_ineligible(frame))
+                                continue
+                            stats = entry.stat(follow_symlinks=False)
+                            self.stats.stat_calls += 1
+                            subdirs.append((entry.path, child_state, stats))
+                        elif entry.is_file(follow_symlinks=False):
+                            stats = entry.stat(follow_symlinks=False)
+                            self.stats.stat_calls += 1
+                            self.stats.files_yielded += 1
+                            record = FileRecord.from_entry(entry, stats)
+                            files += 1
+                            dev = record.dev
+                            if not self.is_candidate(record):
+                                released.extend(self._mark_ineligible(frame))
+                                continue
+                            frame.size += record.size
+                            frame.files += 1
+                            frame.newest = max(frame.newest, record.mtime)
+                            if frame.eligible:
+                                frame.buffer.append(record)
+                            else:
+                                released.append(record)
+                        else:
+                            # Symlinks and special files are never bulk deleted
+                            released.extend(self._mark_ineligible(frame))
+                    except OSError as e:
+                        self.stats.errors += 1
+                        released.extend(self._mark_ineligible(frame))
+                        logging.error(f"Error reading {entry.path}: {e}")
+        except OSError as e:
+            self.stats.errors += 1
+            released.extend(self._mark_ineligible(frame))
+            logging.error(f"Error scanning directory {frame.path}: {e}")
+        frame.pending = subdirs
+        if self.throttle is not None:
+            self.charge(dev, 1 + files, started)
+        return released
+
+    def _leave(self, frame):
+        """Finish a directory; return records to yield"""
+        parent = frame.parent
+        if not frame.eligible or parent is None:
+            # Root or mixed directory: whatever is still buffered goes out
+            return frame.buffer
+        stats = frame.stats
+        tree = TreeRecord(frame.path, frame.size, frame.newest, stats.st_mtime, frame.files,
+                          stats.st_ino, stats.st_dev,
+                          reason=f"stale subtree, {frame.files} files", dirs=tuple(frame.dirs))
+        self.trees_found += 1
+        parent.size += frame.size
+        parent.files += frame.files
+        parent.newest = max(parent.newest, frame.newest)
+        if parent.eligible:
+            parent.buffer.append(tree)
+            # If the parent collapses too, its tree covers this one's directories
+            parent.dirs.append((frame.path, stats.st_mtime))
+            parent.dirs.extend(frame.dirs)
+            return []
+        return [tree]
+
+    def walk(self, root):
+        """Yield FileRecords and TreeRecords for everything deletable below root"""
+        root = os.fspath(root)
+        state = self.root_state(root)
+        if state is None:
+            return
+        now = time.time()
+        frame = _Frame(root, state, None, None)
+        yield from self._enter(frame, now)
+        while frame is not None:
+            if frame.pending:
+                path, child_state, stats = frame.pending.pop()
+                frame = _Frame(path, child_state, stats, frame)
+                yield from self._enter(frame, now)
+                continue
+            yield from self._leave(frame)
+            frame = frame.parent
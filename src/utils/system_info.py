@@ -1,11 +1,44 @@
-import shutil
+import os
 
-def get_disk_space_info(drive="C:\"):
-    """Get detailed disk space information"""
-    total, used, free = shutil.disk_usage(drive)
+def get_disk_space_info(path=None):
+    """Get detailed disk space information for the volume holding path"""
+    if path is None:
+        path = os.path.abspath(os.sep)
+    if hasattr(os, 'statvfs'):
+        # Same numbers as shutil.disk_usage without importing shutil
+        st = os.statvfs(path)
+        free = st.f_bavail * st.f_frsize
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    else:
+        import shutil
+        total, used, free = shutil.disk_usage(path)
     return {
+        'path': str(path),
         'total_gb': total / (2**30),
         'used_gb': used / (2**30),
         'free_gb': free / (2**30),
-        'free_percent': (free / total) * 100
-    }
\ No newline at end of file
+        'free_bytes': free,
+        'free_percent': (free / total) * 100 if total else 0.0
+    }
+
+def get_mount_point(path):
+    """Walk up from path until the device changes"""
+    path = os.path.realpath(path)
+    dev = os.stat(path).st_dev
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path or os.stat(parent).st_dev != dev:
+            return path
+        path = parent
+
+def group_by_device(paths):
+    """Group existing paths by st_dev, returning {dev: [paths]} in input order"""
+    groups = {}
+    for path in paths:
+        try:
+            dev = os.stat(path).st_dev
+        except OSError:
+            continue
+        groups.setdefault(dev, []).append(path)
+    return groups
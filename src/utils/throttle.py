@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import logging
+import threading
+
+# ioprio_set(2) syscall numbers; other architectures fall back to no ionice
+IOPRIO_SET = {'x86_64': 251, 'aarch64': 30, 'i686': 289, 'i386': 289}
+IOPRIO_CLASSES = {'realtime': 1, 'best-effort': 2, 'idle': 3}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() sleeps instead of failing.
+
+    Requests larger than the burst are allowed and put the bucket into
+    debt, so the long-run rate holds for any request size.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount):
+        if not self.rate or amount <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class DeviceThrottle:
+    """Ops/s and bytes/s limits for one device with AIMD latency backoff
+
+    An EWMA of the observed per-operation latency is kept. Above
+    ``target_latency`` the effective rates are cut by 30%; below half the
+    target they recover by 5% of the configured rate per observation.
+    """
+
+    def __init__(self, ops_per_sec, bytes_per_sec, burst_seconds, target_latency):
+        self.ops_per_sec = ops_per_sec
+        self.bytes_per_sec = bytes_per_sec
+        self.target_latency = target_latency
+        self.ops = TokenBucket(ops_per_sec, ops_per_sec * burst_seconds)
+        self.bytes = TokenBucket(bytes_per_sec, bytes_per_sec * burst_seconds)
+        self.factor = 1.0
+        self.latency = None
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, ops=1, nbytes=0):
+        waited = self.ops.acquire(ops) + self.bytes.acquire(nbytes)
+        self.waited += waited
+        return waited
+
+    def observe(self, seconds_per_op):
+        if not self.target_latency:
+            return
+        with self._lock:
+            if self.latency is None:
+                self.latency = seconds_per_op
+            else:
+                self.latency = 0.8 * self.latency + 0.2 * seconds_per_op
+            if self.latency > self.target_latency:
+                factor = max(0.05, self.factor * 0.7)
+            elif self.latency < self.target_latency / 2:
+                factor = min(1.0, self.factor + 0.05)
+            else:
+                return
+            if factor != self.factor:
+                self.factor = factor
+                self.ops.rate = self.ops_per_sec * factor
+                self.bytes.rate = self.bytes_per_sec * factor
+
+
+class IOThrottle:
+    """Per-device I/O budget shared by the scan and deletion stages.
+
+    Devices are keyed by st_dev and get their own DeviceThrottle on first
+    use. Callers charge work after doing it (``acquire`` sleeps off any
+    debt) and report the latency they saw with ``observe``.
+    """
+
+    def __init__(self, ops_per_sec=0, mb_per_sec=0, burst_seconds=1.0, target_latency_ms=0):
+        self.ops_per_sec = ops_per_sec or 0
+        self.bytes_per_sec = (mb_per_sec or 0) * 1024 * 1024
+        self.burst_seconds = burst_seconds
+        self.target_latency = (target_latency_ms or 0) / 1000
+        self.devices = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the throttle from ``throttle`` in the config, None when disabled"""
+        settings = config.get('throttle', {})
+        if not settings.get('enabled', False):
+            return None
+        return cls(ops_per_sec=settings.get('ops_per_sec', 0),
+                   mb_per_sec=settings.get('mb_per_sec', 0),
+                   burst_seconds=settings.get('burst_seconds', 1.0),
+                   target_latency_ms=settings.get('target_latency_ms', 0))
+
+    def device(self, dev):
+        throttle = self.devices.get(dev)
+        if throttle is None:
+            with self._lock:
+                throttle = self.devices.get(dev)
+                if throttle is None:
+                    throttle = self.devices[dev] = DeviceThrottle(
+                        self.ops_per_sec, self.bytes_per_sec, self.burst_seconds,
+                        self.target_latency)
+        return throttle
+
+    def acquire(self, dev, ops=1, nbytes=0):
+        return self.device(dev).acquire(ops, nbytes)
+
+    def observe(self, dev, seconds_per_op):
+        self.device(dev).observe(seconds_per_op)
+
+    def log_summary(self):
+        for dev, throttle in self.devices.items():
+            latency = (throttle.latency or 0) * 1e6
+            logging.info(f"Throttle dev {dev}: {throttle.waited:.2f}s waited (all threads), "
+                         f"rate factor {throttle.factor:.2f}, latency ewma {latency:.0f} µs")
+
+
+def _ioprio_set(io_class, level):
+    import ctypes
+    import platform
+    syscall = IOPRIO_SET.get(platform.machine())
+    if not sys.platform.startswith('linux') or syscall is None:
+        raise OSError("ioprio_set is not supported on this platform")
+    libc = ctypes.CDLL(None, use_errno=True)
+    value = (io_class << IOPRIO_CLASS_SHIFT) | (level if io_class != 3 else 0)
+    if libc.syscall(syscall, IOPRIO_WHO_PROCESS, 0, value) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def apply_process_priority(config):
+    """Lower CPU (os.nice) and I/O (ioprio) priority as configured
+
+    Both are per thread on Linux and inherited by threads started later,
+    so this has to run before any worker thread exists, including the
+    async logging thread. Nothing is logged here; the (level, message)
+    pairs returned are meant for logging once it is set up.
+    """
+    messages = []
+    settings = config.get('throttle', {})
+    nice = settings.get('nice', 0)
+    if nice and hasattr(os, 'nice'):
+        try:
+            os.nice(nice)
+            messages.append((logging.INFO, f"Process niceness raised by {nice}"))
+        except OSError as e:
+            messages.append((logging.ERROR, f"Error applying nice {nice}: {e}"))
+    ionice = settings.get('ionice')
+    if ionice:
+        io_class = IOPRIO_CLASSES.get(ionice)
+        if io_class is None:
+            messages.append((logging.ERROR, f"Unknown ionice class: {ionice}"))
+            return messages
+        try:
+            _ioprio_set(io_class, settings.get('ionice_level', 7))
+            messages.append((logging.INFO, f"I/O priority set to {ionice}"))
+        except OSError as e:
+            messages.append((logging.ERROR, f"Error applying ionice {ionice}: {e}"))
+    return messages
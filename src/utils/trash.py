@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import shutil
+import logging
+from urllib.parse import unquote
+from src.utils.system_info import get_mount_point
+from src.utils.locations import resolve_config_path
+
+
+def home_trash_dir():
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(data_home, 'Trash')
+
+
+def parse_trashinfo(path):
+    """Return the DeletionDate of a .trashinfo file as a timestamp (or None)"""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if line.startswith('DeletionDate='):
+                    value = line.split('=', 1)[1].strip()
+                    return time.mktime(time.strptime(value, '%Y-%m-%dT%H:%M:%S'))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def tree_size(path):
+    """Apparent size of a file or directory tree, without following symlinks"""
+    st = os.lstat(path)
+    if not os.path.isdir(path) or os.path.islink(path):
+        return st.st_size
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+def _directory_sizes(trash):
+    """Sizes from the spec's optional ``directorysizes`` cache: {name: (size, mtime)}"""
+    sizes = {}
+    try:
+        with open(os.path.join(trash, 'directorysizes'), 'r') as f:
+            for line in f:
+                parts = line.split(' ', 2)
+                if len(parts) == 3:
+                    sizes[unquote(parts[2].rstrip('\n'))] = (int(parts[0]), int(parts[1]))
+    except (OSError, ValueError):
+        pass
+    return sizes
+
+
+class TrashLocation:
+    """One freedesktop trash directory or the quarantine directory.
+
+    ``items`` maps an entry name to [deletion time, size]. It is kept in
+    the trash index between runs; a run only lists ``info/`` (or the
+    quarantine dir) when its mtime changed, and only parses the
+    .trashinfo files and measures the entries it has not seen before.
+    """
+
+    def __init__(self, path, kind, cached=None):
+        self.path = path
+        self.kind = kind
+        cached = cached or {}
+        self.listing_mtime_ns = cached.get('listing_mtime_ns')
+        self.items = cached.get('items', {})
+
+    @property
+    def listing_dir(self):
+        return os.path.join(self.path, 'info') if self.kind == 'trash' else self.path
+
+    def item_path(self, name):
+        if self.kind == 'trash':
+            return os.path.join(self.path, 'files', name)
+        return os.path.join(self.path, name)
+
+    def refresh(self):
+        """Bring ``items`` up to date; return the number of newly indexed entries"""
+        try:
+            mtime_ns = os.stat(self.listing_dir).st_mtime_ns
+        except OSError:
+            self.items = {}
+            return 0
+        if mtime_ns == self.listing_mtime_ns:
+            return 0
+        added = 0
+        present = set()
+        dir_sizes = _directory_sizes(self.path) if self.kind == 'trash' else {}
+        with os.scandir(self.listing_dir) as it:
+            for entry in it:
+                name = self._item_name(entry)
+                if name is None:
+                    continue
+                present.add(name)
+                if name in self.items:
+                    continue
+                item_path = self.item_path(name)
+                try:
+                    if self.kind == 'trash':
+                        deleted = parse_trashinfo(entry.path) or entry.stat().st_mtime
+                    else:
+                        # A rename into quarantine updates the ctime
+                        deleted = os.lstat(item_path).st_ctime
+                    cached_size = dir_sizes.get(name)
+                    size = cached_size[0] if cached_size else tree_size(item_path)
+                except OSError:
+                    # .trashinfo without its file: stale, drop it on eviction
+                    deleted, size = 0, 0
+                self.items[name] = [deleted, size]
+                added += 1
+        for name in [name for name in self.items if name not in present]:
+            del self.items[name]
+        self.listing_mtime_ns = mtime_ns
+        return added
+
+    def _item_name(self, entry):
+        if self.kind == 'trash':
+            if entry.name.endswith('.trashinfo'):
+                return entry.name[:-len('.trashinfo')]
+            return None
+        return None if entry.name == 'MANIFEST' else entry.name
+
+    def purge(self, name):
+        """Remove one entry (file first, then its .trashinfo)"""
+        item_path = self.item_path(name)
+        if os.path.isdir(item_path) and not os.path.islink(item_path):
+            shutil.rmtree(item_path)
+        elif os.path.lexists(item_path):
+            os.unlink(item_path)
+        if self.kind == 'trash':
+            os.unlink(os.path.join(self.path, 'info', name + '.trashinfo'))
+        del self.items[name]
+
+    def prune_manifest(self):
+        """Drop MANIFEST lines of quarantined files that no longer exist"""
+        manifest = os.path.join(self.path, 'MANIFEST')
+        try:
+            with open(manifest, 'r') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        kept = [line for line in lines
+                if os.path.basename(line.split('\t', 1)[0]) in self.items]
+        if len(kept) != len(lines):
+            tmp = f"{manifest}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                f.writelines(kept)
+            os.replace(tmp, manifest)
+
+    def as_dict(self):
+        return {'listing_mtime_ns': self.listing_mtime_ns, 'items': self.items}
+
+
+class TrashManager:
+    """Keep the trash and the quarantine directory within size and age limits.
+
+    Implements ``recycle_bin.cleanup_recycle_bin``: entries older than
+    ``max_trash_age_days`` are purged, then the oldest entries (by
+    deletion date) until all locations together are below
+    ``max_trash_gb``. Covers the home trash, the ``.Trash-$uid`` trash of
+    every scanned volume and ``deletion.quarantine_dir``. Windows' Recycle
+    Bin is managed by the OS and not touched.
+    """
+
+    def __init__(self, config):
+        settings = config.get('recycle_bin', {})
+        self.enabled = settings.get('cleanup_recycle_bin', False)
+        self.max_bytes = settings.get('max_trash_gb', 5) * 2**30
+        self.max_age_seconds = settings.get('max_trash_age_days', 30) * 86400
+        self.index_path = settings.get('trash_index', 'logs/trash_index.json')
+        quarantine_dir = config.get('deletion', {}).get('quarantine_dir')
+        self.quarantine_dir = resolve_config_path(config, quarantine_dir) if quarantine_dir else None
+
+    def locations(self, roots=()):
+        """Existing trash locations for the home trash, the roots' volumes and quarantine"""
+        candidates = [(home_trash_dir(), 'trash')]
+        if hasattr(os, 'getuid'):
+            for root in roots:
+                try:
+                    mount = get_mount_point(root)
+                except OSError:
+                    continue
+                candidates.append((os.path.join(mount, f'.Trash-{os.getuid()}'), 'trash'))
+                candidates.append((os.path.join(mount, '.Trash', str(os.getuid())), 'trash'))
+        if self.quarantine_dir:
+            candidates.append((self.quarantine_dir, 'quarantine'))
+        seen = set()
+        found = []
+        for path, kind in candidates:
+            if path in seen:
+                continue
+            seen.add(path)
+            if os.path.isdir(path if kind == 'quarantine' else os.path.join(path, 'info')):
+                found.append((path, kind))
+        return found
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self, locations):
+        data = {location.path: location.as_dict() for location in locations}
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.index_path)
+
+    def cleanup(self, roots=(), dry_run=True):
+        """Purge expired entries, then the oldest until under the size limit
+
+        Returns (MB purged, entries purged).
+        """
+        index = self.load_index()
+        locations = [TrashLocation(path, kind, index.get(path))
+                     for path, kind in self.locations(roots)]
+        if not locations:
+            logging.info("No trash directories found")
+            return 0.0, 0
+        added = sum(location.refresh() for location in locations)
+
+        # Oldest first; location path and name only break ties deterministically
+        entries = sorted(((item[0], item[1], location, name)
+                          for location in locations
+                          for name, item in location.items.items()),
+                         key=lambda entry: (entry[0], entry[1], entry[2].path, entry[3]))
+        total = sum(size for _, size, _, _ in entries)
+        logging.info(f"Trash: {len(entries)} entries, {total / 2**30:.2f} GB in "
+                     f"{len(locations)} locations ({added} newly indexed)")
+
+        cutoff = time.time() - self.max_age_seconds
+        purged = 0
+        purged_bytes = 0
+        for deleted, size, location, name in entries:
+            if deleted >= cutoff and total - purged_bytes <= self.max_bytes:
+                break
+            when = time.strftime('%Y-%m-%d', time.localtime(deleted)) if deleted else 'unknown'
+            if dry_run:
+                logging.info(f"Would purge from trash: {location.item_path(name)} "
+                             f"({size / (1024 * 1024):.2f} MB, deleted {when})")
+            else:
+                try:
+                    location.purge(name)
+                except OSError as e:
+                    logging.error(f"Error purging {location.item_path(name)}: {e}")
+                    continue
+                logging.info(f"Purged from trash: {location.item_path(name)} "
+                             f"({size / (1024 * 1024):.2f} MB, deleted {when})")
+            purged += 1
+            purged_bytes += size
+
+        if not dry_run:
+            for location in locations:
+                if location.kind == 'quarantine' and purged:
+                    location.prune_manifest()
+                # Our own purges changed the listing; skip a needless re-list
+                try:
+                    location.listing_mtime_ns = os.stat(location.listing_dir).st_mtime_ns
+                except OSError:
+                    pass
+        self.save_index(locations)
+        verb = "Would purge" if dry_run else "Purged"
+        logging.info(f"{verb} {purged} trash entries ({purged_bytes / (1024 * 1024):.2f} MB)")
+        return purged_bytes / (1024 * 1024), purged
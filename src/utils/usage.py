@@ -0,0 +1,202 @@
+import os
+import csv
+import json
+import time
+import heapq
+import logging
+from array import array
+from bisect import bisect_right
+from src.utils.scanner import Scanner
+
+SECONDS_PER_DAY = 24 * 60 * 60
+OTHER = '(other)'
+NO_EXTENSION = '(none)'
+
+# Accumulator layout: four totals followed by one (files, bytes) pair per age bucket
+FILES, BYTES, RECLAIM_FILES, RECLAIM_BYTES = range(4)
+HEADER_FIELDS = ('files', 'bytes', 'reclaimable_files', 'reclaimable_bytes')
+
+
+def extension_of(name, max_length=16):
+    """Lower-cased last suffix of a file name (hidden files have none)"""
+    dot = name.rfind('.')
+    if dot <= 0:
+        return NO_EXTENSION
+    ext = name[dot:].lower()
+    return ext if len(ext) <= max_length else OTHER
+
+
+class UsageReport:
+    """Disk usage by directory, extension and age, collected in one walk.
+
+    The walk uses the cleanup Scanner (same protected/excluded directory
+    pruning, same I/O throttle) in post order. Every directory gets one
+    flat integer array that is folded into its parent when the directory
+    is finished, so only the directories on the current path are held in
+    memory. Finished subtrees within ``max_depth`` of a root compete for
+    a heap of the ``top_n`` heaviest, and extensions beyond
+    ``max_extensions`` distinct values are counted under "(other)".
+
+    "Reclaimable" files match the current age, size and extension rules
+    and are not of a protected type; the in-use check is left to the
+    actual cleanup run.
+    """
+
+    def __init__(self, config, rules, throttle=None):
+        settings = config.get('report', {})
+        self.top_n = settings.get('top_n', 50)
+        self.max_depth = settings.get('max_depth', 4)
+        self.max_extensions = settings.get('max_extensions', 500)
+        self.age_buckets = sorted(settings.get('age_buckets_days', [1, 7, 30, 90, 365]))
+        self.rules = rules
+        self.scanner = Scanner(rules=rules)
+        self.scanner.throttle = throttle
+        self.width = 4 + 2 * (len(self.age_buckets) + 1)
+        self.totals = self._accumulator()
+        self.extensions = {}
+        self.subtrees = []
+        self.roots = []
+        self.now = time.time()
+        self._limits = [days * SECONDS_PER_DAY for days in self.age_buckets]
+
+    def _accumulator(self):
+        return array('q', bytes(8 * self.width))
+
+    @property
+    def bucket_labels(self):
+        labels = []
+        low = 0
+        for days in self.age_buckets:
+            labels.append(f"{low}-{days}d")
+            low = days
+        labels.append(f">{low}d")
+        return labels
+
+    def _add_files(self, directory, files, acc):
+        rules = self.rules
+        now = self.now
+        limits = self._limits
+        extensions = self.extensions
+        for record in files:
+            size = record.size
+            age = now - record.mtime
+            slot = 4 + 2 * bisect_right(limits, age)
+            acc[FILES] += 1
+            acc[BYTES] += size
+            acc[slot] += 1
+            acc[slot + 1] += size
+            reclaimable = (rules.path_reason(directory, record.name, size, record.mtime, now)
+                           is not None and not rules.is_protected_ext(record.name))
+            if reclaimable:
+                acc[RECLAIM_FILES] += 1
+                acc[RECLAIM_BYTES] += size
+
+            ext = extension_of(record.name)
+            ext_acc = extensions.get(ext)
+            if ext_acc is None:
+                if len(extensions) >= self.max_extensions:
+                    ext = OTHER
+                ext_acc = extensions.get(ext)
+                if ext_acc is None:
+                    ext_acc = extensions[ext] = self._accumulator()
+            ext_acc[FILES] += 1
+            ext_acc[BYTES] += size
+            ext_acc[slot] += 1
+            ext_acc[slot + 1] += size
+            if reclaimable:
+                ext_acc[RECLAIM_FILES] += 1
+                ext_acc[RECLAIM_BYTES] += size
+
+    def _enter(self, path, state, depth):
+        """Scan one directory; return its frame [path, depth, acc, subdirectory iterator]"""
+        files, subdirs = self.scanner.scan_dir(path, state)
+        self.scanner.stats.files_yielded += len(files)
+        acc = self._accumulator()
+        self._add_files(path, files, acc)
+        return [path, depth, acc, iter(subdirs)]
+
+    def _finish(self, path, depth, acc):
+        if depth > self.max_depth:
+            return
+        entry = (acc[BYTES], path, acc)
+        if len(self.subtrees) < self.top_n:
+            heapq.heappush(self.subtrees, entry)
+        elif entry[0] > self.subtrees[0][0]:
+            heapq.heapreplace(self.subtrees, entry)
+
+    def scan(self, root):
+        """Add one root to the report"""
+        root = os.path.abspath(root)
+        state = self.scanner.root_state(root)
+        if state is None:
+            return
+        self.roots.append(root)
+        stack = [self._enter(root, state, 0)]
+        while stack:
+            frame = stack[-1]
+            child = next(frame[3], None)
+            if child is not None:
+                stack.append(self._enter(child[0], child[1], frame[1] + 1))
+                continue
+            stack.pop()
+            path, depth, acc, _ = frame
+            self._finish(path, depth, acc)
+            parent = stack[-1][2] if stack else self.totals
+            for i in range(self.width):
+                parent[i] += acc[i]
+
+    def _row(self, acc):
+        row = dict(zip(HEADER_FIELDS, acc[:4]))
+        row['age'] = {label: {'files': acc[4 + 2 * i], 'bytes': acc[5 + 2 * i]}
+                      for i, label in enumerate(self.bucket_labels)}
+        return row
+
+    def as_dict(self):
+        subtrees = sorted(self.subtrees, key=lambda entry: entry[0], reverse=True)
+        extensions = sorted(self.extensions.items(), key=lambda item: item[1][BYTES], reverse=True)
+        return {
+            'generated': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.now)),
+            'roots': self.roots,
+            'rules': {'min_age_days': self.rules.min_age_seconds / SECONDS_PER_DAY,
+                      'min_size_bytes': self.rules.min_size_bytes,
+                      'policies': getattr(self.rules, 'names', [])},
+            'totals': self._row(self.totals),
+            'subtrees': [dict(path=path, **self._row(acc)) for _, path, acc in subtrees],
+            'extensions': [dict(extension=ext, **self._row(acc)) for ext, acc in extensions],
+        }
+
+    def write(self, path):
+        """Write the report as CSV (for a .csv path) or JSON"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = self.as_dict()
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                self._write_csv(f, data)
+        else:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+
+    def _write_csv(self, f, data):
+        labels = self.bucket_labels
+        writer = csv.writer(f)
+        writer.writerow(['kind', 'key', *HEADER_FIELDS,
+                         *(f"{label}_{field}" for label in labels for field in ('files', 'bytes'))])
+
+        def row(kind, key, values):
+            ages = [values['age'][label][field] for label in labels for field in ('files', 'bytes')]
+            writer.writerow([kind, key, *(values[field] for field in HEADER_FIELDS), *ages])
+
+        row('total', ';'.join(data['roots']), data['totals'])
+        for subtree in data['subtrees']:
+            row('subtree', subtree['path'], subtree)
+        for extension in data['extensions']:
+            row('extension', extension['extension'], extension)
+
+    def log_summary(self):
+        totals = self.totals
+        logging.info(f"Usage: {totals[FILES]} files, {totals[BYTES] / (1024 * 1024):.2f} MB; "
+                     f"reclaimable under current rules: {totals[RECLAIM_FILES]} files, "
+                     f"{totals[RECLAIM_BYTES] / (1024 * 1024):.2f} MB")
+        for size, path, _ in sorted(self.subtrees, reverse=True)[:10]:
+            logging.info(f"  {size / (1024 * 1024):10.2f} MB  {path}")
@@ -0,0 +1,181 @@
+"""Benchmark harness for the cleanup pipeline.
+
+Every case runs in its own interpreter against a freshly generated
+synthetic tree (see synthetic_tree.py), so peak RSS is per case:
+
+    python tests/benchmark_cleanup.py --files 100000 --depth 4 --fanout 8
+    python tests/benchmark_cleanup.py --save-baseline
+    python tests/benchmark_cleanup.py --tolerance 0.2   # exit 1 on regression
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import resource
+import subprocess
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(Path(__file__).parent))
+
+from synthetic_tree import DEFAULT_SPEC, generate_tree
+
+CASES = ["file_manager", "agent_dry_run", "clean_folder"]
+DEFAULT_BASELINE = Path(__file__).parent / "benchmark_baseline.json"
+
+
+def _bench_config(workdir, overrides):
+    with open(project_root / "src" / "config" / "settings.json") as f:
+        config = json.load(f)
+    config["cleanup"]["min_file_age_days"] = overrides.get("min_file_age_days", 7)
+    config["deletion"]["backend"] = "unlink"
+    config["logging"]["per_file"] = overrides.get("per_file", "summary")
+    config["scan"]["workers"] = overrides.get("workers", config["scan"]["workers"])
+    path = Path(workdir) / "settings.json"
+    with open(path, "w") as f:
+        json.dump(config, f, indent=4)
+    return config, path
+
+
+def run_case(case, tree, workdir, overrides):
+    """Run one case in this process and return its measurements"""
+    os.chdir(workdir)
+    # Keep send2trash (clean_folder) away from the real trash
+    os.environ["XDG_DATA_HOME"] = str(Path(workdir) / "xdg")
+    config, config_path = _bench_config(workdir, overrides)
+
+    from src.cleanup_agent import CleanupAgent
+    agent = CleanupAgent(str(config_path))
+    scan_stats = None
+
+    started = time.perf_counter()
+    if case == "file_manager":
+        size_mb, count = agent.file_manager.clean_directory(tree)
+        scan_stats = agent.file_manager.scanner.stats
+    elif case == "agent_dry_run":
+        agent.config["locations"] = {"temp_cleanup": False, "custom_folders": [tree]}
+        agent.run(dry_run=True)
+        scan_stats = agent.file_manager.scanner.stats
+        count = None
+    elif case == "clean_folder":
+        from src.utils import file_operations
+        cleanup = config["cleanup"]
+        size_mb, count = file_operations.clean_folder(
+            tree, cleanup["min_file_age_days"], cleanup["min_size_mb"],
+            cleanup["target_extensions"])
+    else:
+        raise ValueError(f"Unknown case: {case}")
+    elapsed = time.perf_counter() - started
+
+    with open(Path(tree) / "tree_spec.json") as f:
+        files = json.load(f)["files"]
+    result = {
+        "case": case,
+        "files": files,
+        "seconds": round(elapsed, 4),
+        "files_per_sec": round(files / elapsed, 1) if elapsed else 0.0,
+        "deleted": count,
+        "syscalls_per_file": None,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss /
+                             (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+    }
+    if scan_stats is not None:
+        result["syscalls_per_file"] = round(scan_stats.syscalls / files, 3) if files else 0.0
+    return result
+
+
+def run_isolated(case, spec, overrides):
+    """Generate a fresh tree and run the case in a child interpreter"""
+    workdir = tempfile.mkdtemp(prefix=f"bench-{case}-")
+    try:
+        tree = os.path.join(workdir, "tree")
+        generate_tree(tree, **spec)
+        output = subprocess.run(
+            [sys.executable, __file__, "--single", case, "--tree", tree,
+             "--workdir", workdir, "--overrides", json.dumps(overrides)],
+            check=True, capture_output=True, text=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """Return human readable regressions against a baseline"""
+    regressions = []
+    for result in results:
+        base = baseline.get(result["case"])
+        if not base or base.get("files") != result["files"]:
+            continue
+        if result["files_per_sec"] < base["files_per_sec"] * (1 - tolerance):
+            regressions.append(f"{result['case']}: {result['files_per_sec']} files/s "
+                               f"vs baseline {base['files_per_sec']}")
+        if (result["syscalls_per_file"] is not None and base.get("syscalls_per_file") and
+                result["syscalls_per_file"] > base["syscalls_per_file"] * (1 + tolerance)):
+            regressions.append(f"{result['case']}: {result['syscalls_per_file']} syscalls/file "
+                               f"vs baseline {base['syscalls_per_file']}")
+    return regressions
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--files", type=int, default=DEFAULT_SPEC["files"])
+    parser.add_argument("--depth", type=int, default=DEFAULT_SPEC["depth"])
+    parser.add_argument("--fanout", type=int, default=DEFAULT_SPEC["fanout"])
+    parser.add_argument("--max-age-days", type=int, default=DEFAULT_SPEC["max_age_days"])
+    parser.add_argument("--protected-ratio", type=float, default=DEFAULT_SPEC["protected_ratio"])
+    parser.add_argument("--seed", type=int, default=DEFAULT_SPEC["seed"])
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    parser.add_argument("--tree", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--overrides", default="{}", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        result = run_case(args.single, args.tree, args.workdir, json.loads(args.overrides))
+        print(json.dumps(result))
+        return 0
+
+    spec = {"files": args.files, "depth": args.depth, "fanout": args.fanout,
+            "max_age_days": args.max_age_days, "protected_ratio": args.protected_ratio,
+            "seed": args.seed}
+    overrides = {}
+    if args.workers:
+        overrides["workers"] = args.workers
+
+    results = []
+    for case in args.cases.split(","):
+        result = run_isolated(case, spec, overrides)
+        results.append(result)
+        print(f"{case:15} {result['files']:>9} files  {result['seconds']:>8.3f}s  "
+              f"{result['files_per_sec']:>10.1f} files/s  "
+              f"syscalls/file={result['syscalls_per_file']}  rss={result['peak_rss_mb']} MB")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({r["case"]: r for r in results}, f, indent=4)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Scan and delete a synthetic tree as if it were on a network share.
+
+LatencyShim patches os.scandir, os.stat, os.lstat, os.unlink and
+os.rename in this process so that every metadata operation sleeps for a
+simulated round trip (DirEntry.stat() included), which lets the async
+scanner and deletion backend be compared with the thread based ones on a
+local disk:
+
+    python tests/benchmark_network.py --files 5000 --latency-ms 2
+    python tests/benchmark_network.py --concurrency 128 --mount-limit 32
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(Path(__file__).parent))
+
+from synthetic_tree import generate_tree
+
+
+class _SlowEntry:
+    """DirEntry proxy whose stat() pays the round trip an uncached stat costs"""
+    __slots__ = ('_entry', '_delay', 'name', 'path')
+
+    def __init__(self, entry, delay):
+        self._entry = entry
+        self._delay = delay
+        self.name = entry.name
+        self.path = entry.path
+
+    def inode(self):
+        return self._entry.inode()
+
+    def is_dir(self, *, follow_symlinks=True):
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, *, follow_symlinks=True):
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def stat(self, *, follow_symlinks=True):
+        if os.name != 'nt':
+            time.sleep(self._delay)
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+    def __fspath__(self):
+        return self.path
+
+
+class _SlowScandir:
+    def __init__(self, iterator, delay):
+        self._iterator = iterator
+        self._delay = delay
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return _SlowEntry(next(self._iterator), self._delay)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._iterator.close()
+
+
+class LatencyShim:
+    """Add ``latency_ms`` to every metadata call made through the os module"""
+    PATCHED = ('stat', 'lstat', 'unlink', 'rename')
+
+    def __init__(self, latency_ms):
+        self.delay = latency_ms / 1000
+        self.saved = {}
+
+    def _slow(self, function):
+        delay = self.delay
+
+        def wrapper(*args, **kwargs):
+            time.sleep(delay)
+            return function(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        self.saved = {name: getattr(os, name) for name in self.PATCHED + ('scandir',)}
+        for name in self.PATCHED:
+            setattr(os, name, self._slow(self.saved[name]))
+        scandir = self.saved['scandir']
+        delay = self.delay
+
+        def slow_scandir(path='.'):
+            time.sleep(delay)
+            return _SlowScandir(scandir(path), delay)
+        os.scandir = slow_scandir
+        return self
+
+    def __exit__(self, *exc):
+        for name, function in self.saved.items():
+            setattr(os, name, function)
+
+
+def bench_scan(name, scanner, tree, shim):
+    with shim:
+        started = time.perf_counter()
+        if hasattr(scanner, 'walk_all'):
+            count = sum(len(batch) for batch in scanner.walk_batches([tree]))
+        else:
+            count = sum(1 for _ in scanner.walk(tree))
+        elapsed = time.perf_counter() - started
+    print(f"scan   {name:<22} {count:7d} files  {elapsed:8.2f} s  {count / elapsed:9.0f} files/s")
+    return count, elapsed
+
+
+def bench_delete(name, backend, tree, shim, workers):
+    from src.utils.scanner import Scanner
+    from src.utils.deleters import DeletionPipeline
+    records = list(Scanner().walk(tree))
+    pipeline = DeletionPipeline(backend, workers=workers, batch_size=64)
+    with shim:
+        started = time.perf_counter()
+        for record in records:
+            pipeline.submit(record)
+        stats = pipeline.close()
+        elapsed = time.perf_counter() - started
+    print(f"delete {name:<22} {stats.files:7d} files  {elapsed:8.2f} s  "
+          f"{stats.files / elapsed:9.0f} files/s  ({stats.errors} failed)")
+    return stats.files, elapsed
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=4, help="threads for the thread based cases")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--mount-limit", type=int, default=0,
+                        help="per-mount limit for the async cases (0: --concurrency)")
+    args = parser.parse_args()
+
+    from src.utils.scanner import Scanner
+    from src.utils.parallel_scanner import ParallelScanner
+    from src.utils.deleters import UnlinkBackend
+    from src.utils.async_io import AsyncScanner, AsyncUnlinkBackend, MountLimits
+
+    workdir = tempfile.mkdtemp(prefix="bench-network-")
+    try:
+        tree = os.path.join(workdir, "share")
+        spec = dict(files=args.files, depth=args.depth, fanout=args.fanout, protected_ratio=0)
+        generate_tree(tree, **spec)
+        mount_concurrency = {tree: args.mount_limit} if args.mount_limit else {}
+        limits = MountLimits(args.concurrency, mount_concurrency)
+        shim = LatencyShim(args.latency_ms)
+        print(f"{args.files} files, {args.latency_ms} ms per metadata operation")
+
+        results = {}
+        results["sequential"] = bench_scan("sequential", Scanner(), tree, shim)
+        results["threads"] = bench_scan(f"threads x{args.workers}",
+                                        ParallelScanner(args.workers), tree, shim)
+        results["async"] = bench_scan(f"async x{args.concurrency}",
+                                      AsyncScanner(args.concurrency, limits=limits), tree, shim)
+        counts = {count for count, _ in results.values()}
+        if len(counts) != 1:
+            print(f"MISMATCH scanners returned different file counts: {sorted(counts)}")
+            return 1
+
+        for name, backend, workers in (
+                (f"unlink x{args.workers}", UnlinkBackend(), args.workers),
+                (f"async x{args.concurrency}", AsyncUnlinkBackend(limits), 2)):
+            shutil.rmtree(tree)
+            generate_tree(tree, **spec)
+            results[f"delete {name}"] = bench_delete(name, backend, tree, shim, workers)
+
+        print(json.dumps({name: round(elapsed, 3) for name, (_, elapsed) in results.items()}))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
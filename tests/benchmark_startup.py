@@ -0,0 +1,71 @@
+"""Startup-time guard for the CLI no-op path.
+
+Runs ``python -m src --pressure`` against a config whose disk threshold
+can never be reached, so the CLI has nothing to do and exits early, and
+compares the median wall time with a budget:
+
+    python tests/benchmark_startup.py                # exit 1 if over budget
+    python tests/benchmark_startup.py --runs 50 --max-ms 60
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+
+def time_command(command, runs, env=None):
+    """Median and best wall time in milliseconds"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=project_root, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=60.0,
+                        help="budget for the median no-op run")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-startup-")
+    try:
+        with open(project_root / "src" / "config" / "settings.json") as f:
+            config = json.load(f)
+        config["cleanup"]["low_disk_threshold_gb"] = 0
+        config_path = os.path.join(workdir, "settings.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f, indent=4)
+
+        noop = [sys.executable, "-m", "src", "--pressure", "--config", config_path]
+        # First run writes the config cache
+        subprocess.run(noop, cwd=project_root, check=True, stdout=subprocess.DEVNULL)
+
+        interpreter, _ = time_command([sys.executable, "-c", "pass"], args.runs)
+        median, best = time_command(noop, args.runs)
+        print(f"interpreter   median {interpreter:7.1f} ms")
+        print(f"cli no-op     median {median:7.1f} ms  best {best:7.1f} ms  "
+              f"(+{median - interpreter:.1f} ms over a bare interpreter)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if median > args.max_ms:
+        print(f"REGRESSION cli no-op median {median:.1f} ms exceeds {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
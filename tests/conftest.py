@@ -0,0 +1,61 @@
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+OLD = time.time() - 30 * 86400
+
+
+@pytest.fixture
+def config():
+    """settings.json deleting with unlink, without system locations or in-use checks"""
+    with open(project_root / "src" / "config" / "settings.json") as f:
+        config = json.load(f)
+    config["safety"]["in_use_check"] = "off"
+    config["deletion"]["backend"] = "unlink"
+    config["locations"] = {"temp_cleanup": False, "custom_folders": []}
+    config["logging"]["async"] = False
+    config["scan"]["workers"] = 1
+    config["cleanup"]["min_file_age_days"] = 1
+    config["cleanup"]["min_size_mb"] = 0
+    return config
+
+
+@pytest.fixture
+def make_file():
+    """Create a file (and its parents) with an mtime ``age_days`` in the past"""
+    def make(path, size=10, age_days=30):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+        age(path, age_days)
+        return path
+    return make
+
+
+def age(path, days=30):
+    stamp = time.time() - days * 86400
+    os.utime(path, (stamp, stamp))
+
+
+def age_dirs(root, days=30):
+    """Backdate every directory below root (deepest first) and root itself"""
+    for directory, _, _ in sorted(os.walk(root), key=lambda item: -item[0].count(os.sep)):
+        age(directory, days)
+
+
+@pytest.fixture
+def file_manager_for():
+    """Build a FileManager for a config"""
+    def build(config):
+        from src.utils.safety_checker import SafetyChecker
+        from src.utils.file_manager import FileManager
+        return FileManager(config, SafetyChecker(config))
+    return build
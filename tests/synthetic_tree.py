@@ -0,0 +1,94 @@
+import os
+import json
+import math
+import time
+import random
+from pathlib import Path
+
+DEFAULT_SPEC = {
+    "files": 1000,              # total number of files
+    "depth": 3,                 # directory levels below the root
+    "fanout": 4,                # sub-directories per directory
+    "size_median_kb": 16,       # log-normal size distribution
+    "size_sigma": 1.5,
+    "max_age_days": 60,         # mtimes spread uniformly over this range
+    "target_ratio": 0.5,        # share of files with a target extension
+    "protected_ratio": 0.05,    # share of leaf directories named "Program Files"
+    "seed": 42,
+    "sparse": True,             # truncate() instead of writing bytes
+}
+
+TARGET_EXTENSIONS = [".tmp", ".log", ".cache", ".bak", ".old"]
+OTHER_EXTENSIONS = [".txt", ".doc", ".png", ".py", ".exe"]
+
+
+def _directories(root, depth, fanout, protected_ratio, rng):
+    """Build the directory list breadth first; returns (all, leaves)"""
+    level = [root]
+    directories = [root]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                next_level.append(parent / f"d{i}")
+        directories.extend(next_level)
+        level = next_level
+    leaves = level
+    for i, leaf in enumerate(leaves):
+        if rng.random() < protected_ratio:
+            leaves[i] = leaf / "Program Files"
+            directories.append(leaves[i])
+    return directories, leaves
+
+
+def generate_tree(root, **overrides):
+    """Create a reproducible synthetic tree under root and return its spec"""
+    spec = dict(DEFAULT_SPEC, **overrides)
+    rng = random.Random(spec["seed"])
+    root = Path(root)
+    directories, leaves = _directories(root, spec["depth"], spec["fanout"],
+                                       spec["protected_ratio"], rng)
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    now = time.time()
+    mu = math.log(spec["size_median_kb"] * 1024)
+    counts = {"target": 0, "protected": 0, "bytes": 0}
+    for n in range(spec["files"]):
+        directory = rng.choice(leaves) if rng.random() < 0.8 else rng.choice(directories)
+        is_target = rng.random() < spec["target_ratio"]
+        ext = rng.choice(TARGET_EXTENSIONS if is_target else OTHER_EXTENSIONS)
+        path = directory / f"f{n}{ext}"
+        size = int(rng.lognormvariate(mu, spec["size_sigma"]))
+
+        with open(path, "wb") as f:
+            if spec["sparse"]:
+                f.truncate(size)
+            else:
+                f.write(b"\0" * size)
+        mtime = now - rng.uniform(0, spec["max_age_days"]) * 86400
+        os.utime(path, (mtime, mtime))
+
+        counts["target"] += is_target
+        counts["protected"] += directory.name == "Program Files"
+        counts["bytes"] += size
+
+    spec.update(counts, directories=len(directories), root=str(root))
+    with open(root / "tree_spec.json", "w") as f:
+        json.dump(spec, f, indent=4)
+    return spec
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic cleanup test tree")
+    parser.add_argument("root")
+    for key, value in DEFAULT_SPEC.items():
+        if isinstance(value, bool):
+            parser.add_argument(f"--{key.replace('_', '-')}", type=lambda v: v.lower() == "true",
+                                default=value)
+        else:
+            parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = vars(parser.parse_args())
+    root = args.pop("root")
+    print(json.dumps(generate_tree(root, **args), indent=4))
@@ -0,0 +1,23 @@
+import os
+
+from src.utils.async_io import AsyncScanner
+from src.utils.metrics import Metrics
+
+
+def test_subdirectories_carry_their_own_device(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "file").write_bytes(b"x")
+
+    files, subdirs, stats = AsyncScanner(4)._list_dir(str(tmp_path), (), -1)
+    assert subdirs == [(str(tmp_path / "sub"), (), os.stat(tmp_path / "sub").st_dev)]
+
+
+def test_directory_listings_are_timed(tmp_path):
+    for name in ("a/b", "a/c", "d"):
+        (tmp_path / name).mkdir(parents=True)
+        (tmp_path / name / "file").write_bytes(b"x")
+    scanner = AsyncScanner(4)
+    scanner.metrics = Metrics({"metrics": {"enabled": True}})
+
+    assert sum(len(batch) for batch in scanner.walk_batches([tmp_path])) == 3
+    assert scanner.metrics.histograms["walk_dir"].count == 5
@@ -0,0 +1,95 @@
+import os
+
+from src.utils.scanner import FileRecord
+from src.utils.deleters import FreedesktopTrashBackend, QuarantineBackend
+
+
+def _record(path):
+    st = os.lstat(path)
+    return FileRecord(str(path), path.name, st.st_size, st.st_mtime, st.st_ino, st.st_dev)
+
+
+def test_quarantine_never_overwrites(tmp_path):
+    quarantine = tmp_path / "quarantine"
+    backend = QuarantineBackend(str(quarantine))
+    first = tmp_path / "a" / "same.tmp"
+    second = tmp_path / "b" / "same.tmp"
+    for path, content in ((first, b"first"), (second, b"second")):
+        path.parent.mkdir()
+        path.write_bytes(content)
+    records = [_record(first), _record(second)]
+    # Without an inode both records map to the same base name
+    for record in records:
+        record.ino = 0
+
+    deleted, failed = backend.delete_batch(records)
+    assert (len(deleted), failed) == (2, [])
+    assert sorted((quarantine / name).read_bytes() for name in ("same.tmp", "same.tmp.1")) == \
+        [b"first", b"second"]
+    manifest = (quarantine / "MANIFEST").read_text().splitlines()
+    assert sorted(line.split("\t")[1] for line in manifest) == [str(first), str(second)]
+
+
+def test_quarantine_releases_name_of_failed_move(tmp_path):
+    quarantine = tmp_path / "quarantine"
+    backend = QuarantineBackend(str(quarantine))
+    path = tmp_path / "gone.tmp"
+    path.write_bytes(b"x")
+    record = _record(path)
+    path.unlink()
+
+    deleted, failed = backend.delete_batch([record])
+    assert deleted == [] and len(failed) == 1
+    assert os.listdir(quarantine) == []
+
+
+def test_trash_failed_rename_keeps_batch_going(tmp_path, monkeypatch):
+    backend = FreedesktopTrashBackend(str(tmp_path / "Trash"))
+    kept = tmp_path / "kept.tmp"
+    trashed = tmp_path / "trashed.tmp"
+    kept.write_bytes(b"x")
+    trashed.write_bytes(b"x")
+    records = [_record(kept), _record(trashed)]
+    rename = os.rename
+
+    def failing_rename(source, target):
+        if source == str(kept):
+            # The .trashinfo vanishes too, so the cleanup unlink fails as well
+            os.unlink(os.path.join(tmp_path, "Trash", "info", "kept.tmp.trashinfo"))
+            raise PermissionError(source)
+        return rename(source, target)
+    monkeypatch.setattr(os, "rename", failing_rename)
+
+    deleted, failed = backend.delete_batch(records)
+    assert [record.name for record in deleted] == ["trashed.tmp"]
+    assert [record.name for record, _ in failed] == ["kept.tmp"]
+    assert kept.exists() and not trashed.exists()
+
+
+def test_failing_result_callback_keeps_workers_alive(tmp_path):
+    from src.utils.deleters import DeletionPipeline, UnlinkBackend
+
+    def on_result(record, error):
+        raise RuntimeError("callback failed")
+
+    pipeline = DeletionPipeline(UnlinkBackend(), workers=1, batch_size=1, queue_size=1,
+                                on_result=on_result)
+    paths = [tmp_path / f"{i}.tmp" for i in range(5)]
+    for path in paths:
+        path.write_bytes(b"x")
+        pipeline.submit(_record(path))
+    stats = pipeline.close()
+    assert stats.files == 5
+    assert not any(path.exists() for path in paths)
+
+
+def test_relative_quarantine_dir_follows_the_config(tmp_path, monkeypatch):
+    from src.utils.deleters import create_backend
+    from src.utils.trash import TrashManager
+    config = {"config_dir": str(tmp_path / "config"),
+              "deletion": {"backend": "quarantine", "quarantine_dir": "quarantine"}}
+    monkeypatch.chdir(tmp_path)
+
+    expected = str(tmp_path / "config" / "quarantine")
+    assert create_backend(config).quarantine_dir == expected
+    assert TrashManager(config).quarantine_dir == expected
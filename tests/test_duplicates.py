@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from conftest import age
+
+
+@pytest.fixture
+def finder_for():
+    def build(config, keep="oldest"):
+        from src.utils.safety_checker import SafetyChecker
+        from src.utils.duplicates import DuplicateFinder
+        config["duplicates"]["keep"] = keep
+        return DuplicateFinder(config, SafetyChecker(config))
+    return build
+
+
+def _write(path, content, age_days):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    age(path, age_days)
+    return path
+
+
+def _names(finder, root):
+    return sorted(os.path.relpath(record.path, root) for record in finder.iter_duplicates([str(root)]))
+
+
+@pytest.mark.parametrize("keep, expected", [
+    ("oldest", ["deep/nested/b.bin", "young.bin"]),
+    ("newest", ["a.bin", "deep/nested/b.bin"]),
+    ("shortest_path", ["deep/nested/b.bin", "young.bin"]),
+])
+def test_keeper_selection(tmp_path, config, finder_for, keep, expected):
+    content = b"same" * 2048
+    _write(tmp_path / "a.bin", content, 30)
+    _write(tmp_path / "deep" / "nested" / "b.bin", content, 20)
+    _write(tmp_path / "young.bin", content, 10)
+    _write(tmp_path / "other.bin", b"diff" * 2048, 30)
+
+    expected = [name.replace("/", os.sep) for name in expected]
+    assert _names(finder_for(config, keep), tmp_path) == expected
+
+
+def test_copies_younger_than_the_minimum_age_stay(tmp_path, config, finder_for):
+    content = b"same" * 2048
+    _write(tmp_path / "a.bin", content, 30)
+    _write(tmp_path / "b.bin", content, 0)
+    assert _names(finder_for(config), tmp_path) == []
+
+
+def test_hard_links_are_not_duplicates(tmp_path, config, finder_for):
+    original = _write(tmp_path / "a.bin", b"same" * 2048, 30)
+    os.link(original, tmp_path / "link.bin")
+    finder = finder_for(config)
+    assert _names(finder, tmp_path) == []
+    assert finder.stats.size_candidates == 0
+
+
+def test_equal_ends_with_different_middle_are_not_duplicates(tmp_path, config, finder_for):
+    chunk = 64 * 1024
+    head, tail = b"h" * chunk, b"t" * chunk
+    _write(tmp_path / "a.bin", head + b"1" * chunk + tail, 30)
+    _write(tmp_path / "b.bin", head + b"2" * chunk + tail, 30)
+    finder = finder_for(config)
+    assert _names(finder, tmp_path) == []
+    assert finder.stats.full_hashed == 2
@@ -0,0 +1,49 @@
+from conftest import age_dirs
+
+
+def _clean(file_manager, root):
+    file_manager.scan_roots = [str(root)]
+    return file_manager.delete_candidates(file_manager.iter_candidates(str(root)))
+
+
+def test_off_by_default(tmp_path, config, make_file, file_manager_for):
+    make_file(tmp_path / "old" / "a.tmp")
+    age_dirs(tmp_path)
+
+    size, count = _clean(file_manager_for(config), tmp_path)
+    assert count == 1
+    assert (tmp_path / "old").is_dir()
+
+
+def test_emptied_directories_are_removed_bottom_up(tmp_path, config, make_file,
+                                                   file_manager_for):
+    make_file(tmp_path / "a.tmp")
+    make_file(tmp_path / "old" / "a.tmp")
+    make_file(tmp_path / "parent" / "child" / "a.tmp")
+    make_file(tmp_path / "mixed" / "a.tmp")
+    make_file(tmp_path / "mixed" / "keep.txt")
+    age_dirs(tmp_path)
+    make_file(tmp_path / "young" / "a.tmp")
+    config["cleanup"]["remove_empty_dirs"] = True
+
+    size, count = _clean(file_manager_for(config), tmp_path)
+    assert count == 5
+    # Emptied old directories go, and so does a parent they leave empty
+    assert not (tmp_path / "old").exists()
+    assert not (tmp_path / "parent").exists()
+    # The scan root, a directory with other files and a recent directory stay
+    assert tmp_path.is_dir()
+    assert sorted(path.name for path in (tmp_path / "mixed").iterdir()) == ["keep.txt"]
+    assert list((tmp_path / "young").iterdir()) == []
+
+
+def test_relative_scan_root(tmp_path, config, make_file, file_manager_for, monkeypatch):
+    make_file(tmp_path / "root" / "old" / "a.tmp")
+    age_dirs(tmp_path / "root")
+    config["cleanup"]["remove_empty_dirs"] = True
+    monkeypatch.chdir(tmp_path)
+
+    size, count = _clean(file_manager_for(config), "root")
+    assert count == 1
+    assert not (tmp_path / "root" / "old").exists()
+    assert (tmp_path / "root").is_dir()
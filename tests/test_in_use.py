@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from src.utils.in_use import InUseDetector, OpenFileSnapshot
+
+linux_only = pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+
+
+def test_snapshot_reads_fd_links(tmp_path):
+    held = tmp_path / "held.tmp"
+    free = tmp_path / "free.tmp"
+    held.write_bytes(b"x")
+    free.write_bytes(b"x")
+    fd_dir = tmp_path / "proc" / "123" / "fd"
+    fd_dir.mkdir(parents=True)
+    os.symlink(held, fd_dir / "3")
+    os.symlink(tmp_path / "deleted", fd_dir / "4")
+    # Not a pid directory, never listed
+    os.symlink(fd_dir.parent, tmp_path / "proc" / "self")
+
+    snapshot = OpenFileSnapshot(proc_root=str(tmp_path / "proc"))
+    st = os.stat(held)
+    assert snapshot.is_open(st.st_dev, st.st_ino)
+    st = os.stat(free)
+    assert not snapshot.is_open(st.st_dev, st.st_ino)
+
+
+def test_snapshot_is_reused_until_invalidated(tmp_path):
+    target = tmp_path / "a.tmp"
+    target.write_bytes(b"x")
+    fd_dir = tmp_path / "proc" / "1" / "fd"
+    fd_dir.mkdir(parents=True)
+    snapshot = OpenFileSnapshot(proc_root=str(tmp_path / "proc"), max_age=3600)
+    st = os.stat(target)
+    assert not snapshot.is_open(st.st_dev, st.st_ino)
+
+    os.symlink(target, fd_dir / "3")
+    assert not snapshot.is_open(st.st_dev, st.st_ino)
+    snapshot.invalidate()
+    assert snapshot.is_open(st.st_dev, st.st_ino)
+
+
+@linux_only
+def test_detector_sees_own_open_file(tmp_path):
+    path = tmp_path / "open.tmp"
+    path.write_bytes(b"x")
+    detector = InUseDetector(mode="auto")
+    assert detector.mode == "proc"
+
+    with open(path, "rb"):
+        detector.begin_run()
+        assert detector.is_in_use(str(path))
+    detector.begin_run()
+    assert not detector.is_in_use(str(path))
+
+
+def test_off_mode_never_reports_in_use(tmp_path):
+    path = tmp_path / "open.tmp"
+    path.write_bytes(b"x")
+    with open(path, "rb"):
+        assert not InUseDetector(mode="off").is_in_use(str(path))
@@ -0,0 +1,71 @@
+from conftest import age_dirs
+from src.utils.plan import Plan, PlanWriter, PlanValidator
+from src.utils.subtree import TreeRecord
+
+
+def _write_plan(file_manager, root, plan_path):
+    writer = PlanWriter(str(plan_path), "fingerprint")
+    records = list(file_manager.iter_candidates(str(root)))
+    for record in records:
+        writer.add(record)
+    writer.close()
+    return records
+
+
+def _apply(file_manager, plan_path):
+    with Plan(str(plan_path)) as plan:
+        validator = PlanValidator(plan)
+        size, count = file_manager.delete_candidates(iter(validator))
+        return count, validator.skipped
+
+
+def test_plan_round_trip(tmp_path, config, make_file, file_manager_for):
+    make_file(tmp_path / "root" / "a.tmp", size=100)
+    make_file(tmp_path / "root" / "sub" / "b.tmp", size=200)
+    make_file(tmp_path / "root" / "build" / "obj" / "c.tmp", size=300)
+    make_file(tmp_path / "root" / "build" / "d.tmp", size=400)
+    age_dirs(tmp_path / "root")
+    config["cleanup"]["bulk_delete_subtrees"] = True
+    records = _write_plan(file_manager_for(config), tmp_path / "root", tmp_path / "plan")
+
+    with Plan(str(tmp_path / "plan")) as plan:
+        assert plan.fingerprint == "fingerprint"
+        assert plan.total_bytes == 1000
+        read = list(PlanValidator(plan))
+    key = lambda record: (record.path, record.size, record.mtime, record.ino, record.dev,
+                          isinstance(record, TreeRecord))
+    assert sorted(map(key, read)) == sorted(map(key, records))
+    trees = {record.path: record for record in records if isinstance(record, TreeRecord)}
+    for record in read:
+        if isinstance(record, TreeRecord):
+            assert record.files == trees[record.path].files
+            assert record.dirs == trees[record.path].dirs
+
+
+def test_modified_file_is_skipped(tmp_path, config, make_file, file_manager_for):
+    kept = make_file(tmp_path / "root" / "a.tmp")
+    make_file(tmp_path / "root" / "b.tmp")
+    file_manager = file_manager_for(config)
+    _write_plan(file_manager, tmp_path / "root", tmp_path / "plan")
+
+    kept.write_bytes(b"rewritten after planning")
+    count, skipped = _apply(file_manager, tmp_path / "plan")
+    assert (count, skipped) == (1, 1)
+    assert kept.exists() and not (tmp_path / "root" / "b.tmp").exists()
+
+
+def test_tree_that_gained_a_nested_file_is_skipped(tmp_path, config, make_file,
+                                                   file_manager_for):
+    make_file(tmp_path / "root" / "build" / "a.tmp")
+    make_file(tmp_path / "root" / "build" / "obj" / "b.tmp")
+    age_dirs(tmp_path / "root")
+    config["cleanup"]["bulk_delete_subtrees"] = True
+    file_manager = file_manager_for(config)
+    records = _write_plan(file_manager, tmp_path / "root", tmp_path / "plan")
+    assert [type(record) for record in records] == [TreeRecord]
+
+    # build's own mtime is unchanged; only build/obj gains an entry
+    (tmp_path / "root" / "build" / "obj" / "fresh_output.o").write_bytes(b"new")
+    count, skipped = _apply(file_manager, tmp_path / "plan")
+    assert (count, skipped) == (0, 1)
+    assert (tmp_path / "root" / "build" / "obj" / "fresh_output.o").exists()
@@ -0,0 +1,68 @@
+import json
+import time
+
+from src.utils.rules import CompiledRules, PolicyRules
+from src.utils.config_cache import CachedConfig
+
+DAY = 86400
+
+
+def _policy_config(config, home):
+    config["cleanup"]["target_extensions"] = [".tmp"]
+    config["cleanup"]["min_file_age_days"] = 1
+    config["policies"] = [
+        {"name": "downloads", "roots": ["Downloads"], "target_extensions": [".zip"],
+         "min_file_age_days": 30},
+        {"name": "installers", "roots": ["Downloads/installers"],
+         "target_extensions": [".msi"], "min_file_age_days": 7},
+    ]
+    (home / "Downloads" / "installers").mkdir(parents=True)
+    (home / "elsewhere").mkdir()
+    return config
+
+
+def test_nested_roots_apply_innermost_first(tmp_path, monkeypatch, config):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    rules = CompiledRules.from_config(_policy_config(config, tmp_path))
+    assert isinstance(rules, PolicyRules)
+    directory = str(tmp_path / "Downloads" / "installers" / "sub")
+    now = time.time()
+
+    assert [name for name, _ in rules.rules_for(directory)] == ["installers", "downloads"]
+    assert rules.path_reason(directory, "setup.msi", 10, now - 10 * DAY, now).startswith(
+        "installers: ")
+    # The enclosing policy still applies below the inner root
+    assert rules.path_reason(directory, "old.zip", 10, now - 40 * DAY, now).startswith(
+        "downloads: ")
+    assert rules.path_reason(directory, "young.zip", 10, now - 10 * DAY, now) is None
+    # Global rules no longer apply below a policy root
+    assert rules.path_reason(directory, "a.tmp", 10, now - 40 * DAY, now) is None
+
+
+def test_directory_outside_every_root_uses_cleanup(tmp_path, monkeypatch, config):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    rules = CompiledRules.from_config(_policy_config(config, tmp_path))
+    directory = str(tmp_path / "elsewhere")
+    now = time.time()
+
+    assert [name for name, _ in rules.rules_for(directory)] == [None]
+    assert rules.path_reason(directory, "a.tmp", 10, now - 2 * DAY, now) is not None
+    assert rules.path_reason(directory, "a.zip", 10, now - 40 * DAY, now) is None
+
+
+def test_cached_rules_follow_home(tmp_path, monkeypatch, config):
+    alice = tmp_path / "alice"
+    bob = tmp_path / "bob"
+    for home in (alice, bob):
+        home.mkdir()
+        _policy_config(config, home)
+    settings = tmp_path / "settings.json"
+    settings.write_text(json.dumps(config))
+
+    monkeypatch.setenv("HOME", str(alice))
+    CachedConfig.load(str(settings)).rules
+    monkeypatch.setenv("HOME", str(bob))
+    cached = CachedConfig.load(str(settings))
+    assert cached._rules_blob is not None
+    directory = str(bob / "Downloads")
+    assert [name for name, _ in cached.rules.rules_for(directory)] == ["downloads"]
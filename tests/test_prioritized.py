@@ -0,0 +1,35 @@
+def _source(file_manager, root, scans):
+    def source():
+        scans.append(root)
+        return file_manager.iter_candidates(str(root))
+    return source
+
+
+def test_everything_is_deleted_in_two_scans(tmp_path, config, make_file, file_manager_for):
+    for i in range(7):
+        make_file(tmp_path / f"f{i}.tmp", size=100 * (i + 1))
+    config["cleanup"]["priority"] = "size"
+    config["cleanup"]["priority_top_k"] = 2
+    scans = []
+    file_manager = file_manager_for(config)
+
+    size, count = file_manager.clean_prioritized(
+        _source(file_manager, tmp_path, scans), dry_run=False)
+    assert count == 7
+    assert len(scans) == 2
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_budget_met_by_top_k_needs_one_scan(tmp_path, config, make_file, file_manager_for):
+    for i in range(7):
+        make_file(tmp_path / f"f{i}.tmp", size=100 * (i + 1))
+    config["cleanup"]["priority"] = "size"
+    config["cleanup"]["priority_top_k"] = 2
+    scans = []
+    file_manager = file_manager_for(config)
+
+    size, count = file_manager.clean_prioritized(
+        _source(file_manager, tmp_path, scans), dry_run=False, byte_budget=1300)
+    # The two largest files (700 + 600 bytes) meet the budget
+    assert (count, len(scans)) == (2, 1)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f"f{i}.tmp" for i in range(5)]
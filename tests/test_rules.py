@@ -0,0 +1,49 @@
+import time
+
+from src.utils.rules import CompiledRules, SECONDS_PER_DAY
+
+
+def _rules(**settings):
+    defaults = dict(protected_directories=["Windows/System32", "/etc"],
+                    protected_extensions=[".exe"],
+                    target_extensions=[".tmp", "~*", ".bak"], min_file_age_days=7)
+    defaults.update(settings)
+    return CompiledRules(**defaults)
+
+
+def test_tilde_glob_means_starts_with_tilde():
+    rules = _rules()
+    assert rules.matches_target("~$report.docx")
+    assert rules.matches_target("~lock")
+    assert not rules.matches_target("notes.txt~")
+    assert not rules.matches_target("a~b.txt")
+
+
+def test_suffixes_match_case_insensitively_and_on_any_dot():
+    rules = _rules()
+    assert rules.target_match("A.TMP") == ".tmp"
+    assert rules.target_match("archive.tmp") == ".tmp"
+    assert rules.target_match("archive.tmp.bak") == ".bak"
+    assert rules.target_match("tmp") is None
+    assert rules.target_match("a.tmpx") is None
+
+
+def test_age_limit_is_inclusive():
+    rules = _rules()
+    now = time.time()
+    limit = 7 * SECONDS_PER_DAY
+    assert rules.matches("a.tmp", 1, now - limit, now)
+    assert not rules.matches("a.tmp", 1, now - limit + 1, now)
+    assert rules.match_reason("a.tmp", 1, now - limit, now) == ".tmp, 7 days old"
+
+
+def test_protected_directories_and_extensions():
+    rules = _rules()
+    assert rules.is_protected_dir("C:/Windows/System32/drivers")
+    assert rules.is_protected_dir("/etc/ssh")
+    assert not rules.is_protected_dir("/home/etc")
+    assert rules.enter_root("/etc") is None
+    state = rules.enter_root("/home/user")
+    assert rules.enter_dir(state, "Documents") is not None
+    assert rules.is_protected_ext("setup.EXE")
+    assert not rules.is_protected_ext(".exe")
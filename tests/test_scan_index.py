@@ -0,0 +1,65 @@
+import os
+
+from conftest import age_dirs
+from src.utils.rules import CompiledRules
+from src.utils.scan_index import IndexedScanner
+
+
+def _scanner(tmp_path, config):
+    return IndexedScanner(str(tmp_path / "index.db"), config,
+                          CompiledRules.from_config(config), full_rescan_hours=24)
+
+
+def _walk(scanner, root):
+    return sorted(os.path.relpath(record.path, root) for record in scanner.walk(str(root)))
+
+
+def test_unchanged_directories_come_from_the_index(tmp_path, config, make_file):
+    root = tmp_path / "root"
+    make_file(root / "a.tmp")
+    make_file(root / "keep.txt")
+    make_file(root / "sub" / "b.tmp")
+    age_dirs(root)
+    first = _scanner(tmp_path, config)
+    assert _walk(first, root) == ["a.tmp", "keep.txt", os.path.join("sub", "b.tmp")]
+    first.close()
+
+    second = _scanner(tmp_path, config)
+    # Only indexed candidates come back, re-stat()-ed, without listing a directory
+    assert _walk(second, root) == ["a.tmp", os.path.join("sub", "b.tmp")]
+    assert second.stats.dirs_reused == 2 and second.stats.dirs_scanned == 0
+    second.close()
+
+
+def test_changed_directory_is_listed_again(tmp_path, config, make_file):
+    root = tmp_path / "root"
+    make_file(root / "a.tmp")
+    make_file(root / "sub" / "b.tmp")
+    age_dirs(root)
+    first = _scanner(tmp_path, config)
+    _walk(first, root)
+    first.close()
+
+    make_file(root / "sub" / "c.tmp")
+    (root / "a.tmp").unlink()
+    second = _scanner(tmp_path, config)
+    assert _walk(second, root) == [os.path.join("sub", "b.tmp"), os.path.join("sub", "c.tmp")]
+    assert second.stats.dirs_scanned == 2
+    second.close()
+
+
+def test_changed_rules_discard_the_index(tmp_path, config, make_file):
+    root = tmp_path / "root"
+    make_file(root / "a.tmp")
+    make_file(root / "b.log")
+    age_dirs(root)
+    config["cleanup"]["target_extensions"] = [".tmp"]
+    first = _scanner(tmp_path, config)
+    _walk(first, root)
+    first.close()
+
+    config["cleanup"]["target_extensions"] = [".log"]
+    second = _scanner(tmp_path, config)
+    assert "b.log" in _walk(second, root)
+    assert second.stats.dirs_reused == 0
+    second.close()
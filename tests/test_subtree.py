@@ -0,0 +1,49 @@
+from conftest import age_dirs
+from src.utils.subtree import TreeRecord
+
+
+def _scan(file_manager, root):
+    return list(file_manager.iter_candidates(str(root)))
+
+
+def test_stale_subtree_is_deleted_as_one_tree(tmp_path, config, make_file, file_manager_for):
+    make_file(tmp_path / "build" / "a.tmp")
+    make_file(tmp_path / "build" / "obj" / "b.tmp")
+    age_dirs(tmp_path)
+    config["cleanup"]["bulk_delete_subtrees"] = True
+    file_manager = file_manager_for(config)
+
+    records = _scan(file_manager, tmp_path)
+    assert len(records) == 1 and isinstance(records[0], TreeRecord)
+    assert records[0].files == 2
+
+    file_manager.delete_candidates(iter(records))
+    assert not (tmp_path / "build").exists()
+
+
+def test_tree_that_gained_a_nested_file_is_kept(tmp_path, config, make_file, file_manager_for):
+    make_file(tmp_path / "build" / "a.tmp")
+    make_file(tmp_path / "build" / "obj" / "b.tmp")
+    age_dirs(tmp_path)
+    config["cleanup"]["bulk_delete_subtrees"] = True
+    file_manager = file_manager_for(config)
+
+    records = _scan(file_manager, tmp_path)
+    # Only build/obj changes; build's own mtime stays as scanned
+    (tmp_path / "build" / "obj" / "fresh_output.o").write_bytes(b"new")
+
+    size, count = file_manager.delete_candidates(iter(records))
+    assert count == 0
+    assert (tmp_path / "build" / "obj" / "fresh_output.o").exists()
+    assert (tmp_path / "build" / "obj" / "b.tmp").exists()
+
+
+def test_mixed_directory_yields_files(tmp_path, config, make_file, file_manager_for):
+    make_file(tmp_path / "build" / "a.tmp")
+    make_file(tmp_path / "build" / "keep.txt")
+    age_dirs(tmp_path)
+    config["cleanup"]["bulk_delete_subtrees"] = True
+
+    records = _scan(file_manager_for(config), tmp_path)
+    assert [record.name for record in records] == ["a.tmp"]
+    assert not isinstance(records[0], TreeRecord)
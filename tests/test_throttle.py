@@ -0,0 +1,17 @@
+import logging
+
+import src.cleanup_agent as cleanup_agent
+
+
+def test_priority_is_lowered_before_logging_starts(config, monkeypatch, caplog):
+    calls = []
+    monkeypatch.setattr(cleanup_agent, "apply_process_priority",
+                        lambda config: calls.append("priority") or
+                        [(logging.INFO, "Process niceness raised by 5")])
+    monkeypatch.setattr(cleanup_agent, "setup_logging",
+                        lambda config, log_file: calls.append("logging"))
+
+    with caplog.at_level(logging.INFO):
+        cleanup_agent.CleanupAgent(config=config)
+    assert calls == ["priority", "logging"]
+    assert "Process niceness raised by 5" in caplog.messages
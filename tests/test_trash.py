@@ -0,0 +1,66 @@
+import os
+import json
+import time
+
+import pytest
+
+from src.utils.trash import TrashManager
+
+
+def _trash_item(trash, name, deleted_days_ago, size=1000):
+    """Add a file to a freedesktop trash directory"""
+    os.makedirs(os.path.join(trash, "files"), exist_ok=True)
+    os.makedirs(os.path.join(trash, "info"), exist_ok=True)
+    with open(os.path.join(trash, "files", name), "wb") as f:
+        f.write(b"x" * size)
+    deleted = time.strftime("%Y-%m-%dT%H:%M:%S",
+                            time.localtime(time.time() - deleted_days_ago * 86400))
+    with open(os.path.join(trash, "info", name + ".trashinfo"), "w") as f:
+        f.write(f"[Trash Info]\nPath=/tmp/{name}\nDeletionDate={deleted}\n")
+
+
+@pytest.fixture
+def trash_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    return {
+        "recycle_bin": {"cleanup_recycle_bin": True, "max_trash_gb": 1,
+                        "max_trash_age_days": 30,
+                        "trash_index": str(tmp_path / "trash_index.json")},
+        "deletion": {"quarantine_dir": str(tmp_path / "quarantine")},
+    }
+
+
+def test_expired_entries_then_oldest_are_evicted(tmp_path, trash_config):
+    trash = str(tmp_path / "data" / "Trash")
+    _trash_item(trash, "expired", 60)
+    _trash_item(trash, "older", 5)
+    _trash_item(trash, "newer", 2)
+    # Room for one of the two remaining 1000 byte entries
+    trash_config["recycle_bin"]["max_trash_gb"] = 1500 / 2**30
+
+    size, count = TrashManager(trash_config).cleanup(dry_run=False)
+    assert count == 2
+    assert sorted(os.listdir(os.path.join(trash, "files"))) == ["newer"]
+    assert sorted(os.listdir(os.path.join(trash, "info"))) == ["newer.trashinfo"]
+
+
+def test_ties_across_locations(tmp_path, trash_config):
+    trash = str(tmp_path / "data" / "Trash")
+    quarantine = tmp_path / "quarantine"
+    _trash_item(trash, "same", 60)
+    quarantine.mkdir()
+    (quarantine / "same").write_bytes(b"x" * 1000)
+    # Same deletion time and size in both locations, as recorded in the index
+    index = {
+        trash: {"listing_mtime_ns": os.stat(os.path.join(trash, "info")).st_mtime_ns,
+                "items": {"same": [1000.0, 1000]}},
+        str(quarantine): {"listing_mtime_ns": os.stat(quarantine).st_mtime_ns,
+                          "items": {"same": [1000.0, 1000]}},
+    }
+    with open(trash_config["recycle_bin"]["trash_index"], "w") as f:
+        json.dump(index, f)
+
+    size, count = TrashManager(trash_config).cleanup(dry_run=False)
+    assert count == 2
+    assert not os.path.exists(os.path.join(trash, "files", "same"))
+    assert not (quarantine / "same").exists()